@@ -2,6 +2,11 @@ import json
 import pickle
 from typing import IO, Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # Adapted from https://stackoverflow.com/questions/18478287/making-object-json-serializable-with-regular-encoder/18561055#18561055
 class PythonObjectEncoder(json.JSONEncoder):
@@ -16,6 +21,22 @@ def _as_python_object(dct):
         return dct
 
 
+def _restore_python_objects(obj: Any) -> Any:
+    """Load the `pickle`d Python objects in a decoded JSON object, innermost first (as `object_hook` does).
+
+    Args:
+        obj (Any): The decoded JSON object.
+
+    Returns:
+        Any: The Python object.
+    """
+    if isinstance(obj, dict):
+        return _as_python_object({k: _restore_python_objects(v) for k, v in obj.items()})
+    elif isinstance(obj, list):
+        return [_restore_python_objects(x) for x in obj]
+    return obj
+
+
 def json_dump(obj: Any,
               fp: IO[str]) -> None:
     """Dump a Python object to file as JSON.
@@ -40,8 +61,7 @@ def json_load(fp: IO[str]) -> Any:
     Returns:
         Any: The Python object.
     """
-    return json.load(fp=fp,
-                     object_hook=_as_python_object)
+    return json_loads(s=fp.read())
 
 
 def json_dumps(obj: Any) -> str:
@@ -61,6 +81,7 @@ def json_dumps(obj: Any) -> str:
 def json_loads(s: str) -> Any:
     """Load a Python object from JSON `str`.
     Non-serializable Python objects are loaded from their `pickle`d `str` representation.
+    The `str` is parsed with `orjson` if it is installed.
 
     Args:
         s (str): The JSON `str`.
@@ -68,5 +89,13 @@ def json_loads(s: str) -> Any:
     Returns:
         Any: The Python object.
     """
+    if orjson is not None:
+        try:
+            obj = orjson.loads(s)
+        # orjson rejects `NaN` and `Infinity`, which `json` writes for non-finite floats
+        except orjson.JSONDecodeError:
+            pass
+        else:
+            return _restore_python_objects(obj) if '_python_object' in s else obj
     return json.loads(s=s,
                       object_hook=_as_python_object)
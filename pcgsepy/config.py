@@ -14,6 +14,7 @@ else:
 config.read(os.path.join(curr_dir, 'configs.ini'))
 
 USE_TORCH = config['LIBRARY'].getboolean('use_torch')
+USE_CUPY = config['LIBRARY'].getboolean('use_cupy', fallback=False)
 ACTIVE_LOGGERS = [x for x in config['LIBRARY'].get('active_loggers').split(',')]
 
 HOST = config['API'].get('host')
@@ -1,5 +1,10 @@
-from typing import List, Tuple
+import heapq
+import logging
+import math
+from typing import Dict, List, Tuple
 
+import numpy as np
+from joblib import Parallel, delayed
 from pcgsepy.config import (CS_MAX_AGE, N_GENS, N_ITERATIONS, N_RETRIES,
                             POP_SIZE)
 from pcgsepy.evo.fitness import Fitness
@@ -8,30 +13,72 @@ from pcgsepy.fi2pop.utils import (create_new_pool, reduce_population,
 from pcgsepy.lsystem.constraints import ConstraintLevel
 from pcgsepy.lsystem.lsystem import LSystem
 from pcgsepy.lsystem.solution import CandidateSolution
+from pcgsepy.structure import Structure
 from tqdm import trange
 
+# slack on the highest possible combined fitness, as the fitnesses can slightly exceed their upper bounds (their normalisers are maxima over a grid)
+_max_fitness_tolerance = 1e-3
+
+
+def _eval_cs(content: Structure,
+             fitnesses: List[Fitness]) -> List[float]:
+    """Evaluate the structure of a single feasible candidate solution.
+    Defined at module level so that it can be dispatched to worker processes; only the structure is exchanged, as the fitnesses do not read anything else from the solution.
+
+    Args:
+        content (Structure): The structure of the candidate solution.
+        fitnesses (List[Fitness]): The list of fitnesses.
+
+    Returns:
+        List[float]: The fitness values.
+    """
+    cs = CandidateSolution(string='', content=content)
+    return [f(cs) for f in fitnesses]
+
+
+def _build_content(string: str,
+                   lsystem: LSystem) -> Tuple[str, Structure]:
+    """Compute the low-level string and the structure of a high-level string.
+    Only strings are exchanged so that the solution's lineage is not serialized when dispatched to worker processes.
+
+    Args:
+        string (str): The high-level string.
+        lsystem (LSystem): The L-system object.
+
+    Returns:
+        Tuple[str, Structure]: The low-level string and the structure.
+    """
+    cs = lsystem._set_structure(cs=lsystem._add_ll_strings(cs=CandidateSolution(string=string)))
+    return cs.ll_string, cs._content
+
 
 class FI2PopSolver:
     def __init__(self,
                  feasible_fitnesses: List[Fitness],
-                 lsystem: LSystem):
+                 lsystem: LSystem,
+                 n_jobs: int = 1):
         """Create the FI-2Pop solver.
         This is the vanilla FI-2Pop solver; the fitness acquirement FI-2Pop is in the notebook in the icmap-elites folder.
 
         Args:
             feasible_fitnesses (List[Fitness]): The list of fitnesses.
             lsystem (LSystem): The L-system object.
+            n_jobs (int, optional): The number of worker processes used to build structures and evaluate fitnesses (`-1` uses all cores, `1` runs sequentially). Defaults to `1`.
         """
         self.feasible_fitnesses = feasible_fitnesses
         self.lsystem = lsystem
+        self.n_jobs = n_jobs
         self.ftop, self.itop = [], []
         self.fmean, self.imean = [], []
         self.ffs, self.ifs = [], []
         self.perc_feas_infeas = []
+        # fitness values cache, keyed by low-level string (the structure is built from it)
+        self._fitness_cache: Dict[str, List[float]] = {}
 
+        # highest possible fitness
+        self.max_fitness = sum([f.bounds[1] for f in self.feasible_fitnesses])
         # number of total soft constraints
-        self.nsc = [c for c in self.lsystem.all_hl_constraints if c.level == ConstraintLevel.SOFT_CONSTRAINT]
-        self.nsc = [c for c in self.lsystem.all_ll_constraints if c.level == ConstraintLevel.SOFT_CONSTRAINT]
+        self.nsc = [c for c in self.lsystem.all_hl_constraints | self.lsystem.all_ll_constraints if c.level == ConstraintLevel.SOFT_CONSTRAINT]
         self.nsc = len(self.nsc) * 0.5
 
     def reset(self):
@@ -40,6 +87,7 @@ class FI2PopSolver:
         self.fmean, self.imean = [], []
         self.ffs, self.ifs = [], []
         self.perc_feas_infeas = []
+        self._fitness_cache = {}
 
     def _compute_fitness(self,
                          cs: CandidateSolution) -> List[float]:
@@ -51,7 +99,124 @@ class FI2PopSolver:
         Returns:
             float: The fitness value.
         """
-        return [f(cs) for f in self.feasible_fitnesses]
+        if cs.ll_string not in self._fitness_cache:
+            self._fitness_cache[cs.ll_string] = _eval_cs(content=cs.content, fitnesses=self.feasible_fitnesses)
+        return self._fitness_cache[cs.ll_string][:]
+
+    def _compute_fitnesses(self,
+                           lcs: List[CandidateSolution]) -> None:
+        """Compute and assign the fitness and combined fitness of a batch of feasible candidate solutions.
+        Candidates whose fitness is already cached are not evaluated again; the others are evaluated in parallel if `n_jobs` is not `1`.
+
+        Args:
+            lcs (List[CandidateSolution]): The feasible candidate solutions.
+        """
+        to_eval = [cs for cs in lcs if cs.ll_string not in self._fitness_cache]
+        if self.n_jobs == 1 or len(to_eval) < 2:
+            fitnesses = [_eval_cs(content=cs.content, fitnesses=self.feasible_fitnesses) for cs in to_eval]
+        else:
+            fitnesses = Parallel(n_jobs=self.n_jobs, batch_size='auto')(delayed(_eval_cs)(cs.content, self.feasible_fitnesses) for cs in to_eval)
+        for cs, fitness in zip(to_eval, fitnesses):
+            self._fitness_cache[cs.ll_string] = fitness
+        if lcs:
+            # aggregate the combined fitnesses of the whole batch at once
+            fitnesses = np.asarray([self._fitness_cache[cs.ll_string] for cs in lcs], dtype=np.float64)
+            ncvs = np.fromiter((cs.ncv for cs in lcs), dtype=np.float64, count=len(lcs))
+            c_fitnesses = fitnesses.sum(axis=1) + (self.nsc - ncvs)
+            for cs, fitness, c_fitness in zip(lcs, fitnesses.tolist(), c_fitnesses.tolist()):
+                cs.fitness = fitness
+                cs.c_fitness = c_fitness
+
+    def _set_contents(self,
+                      lcs: List[CandidateSolution]) -> None:
+        """Set the low-level string and the structure of a batch of candidate solutions.
+        Structures are built in parallel if `n_jobs` is not `1`.
+
+        Args:
+            lcs (List[CandidateSolution]): The candidate solutions.
+        """
+        if self.n_jobs == 1 or len(lcs) < 2:
+            for cs in lcs:
+                self.lsystem._set_structure(cs=self.lsystem._add_ll_strings(cs=cs))
+        else:
+            contents = Parallel(n_jobs=self.n_jobs, batch_size='auto')(delayed(_build_content)(cs.string, self.lsystem) for cs in lcs)
+            for cs, (ll_string, content) in zip(lcs, contents):
+                cs.ll_string = ll_string
+                cs.set_content(content=content)
+
+    def _prune_hopeless(self,
+                        f_pool: Dict[CandidateSolution, None],
+                        new_feasibles: List[CandidateSolution],
+                        pops_size: int) -> List[CandidateSolution]:
+        """Remove from the pool the new feasible solutions that would be culled regardless of their fitness.
+        A solution is hopeless if its highest possible combined fitness (all fitnesses at their upper bound, plus a small tolerance)
+        is lower than the combined fitness of the `pops_size`-th best already evaluated solution.
+
+        Args:
+            f_pool (Dict[CandidateSolution, None]): The Feasible pool, as an insertion-ordered set. Modified in place.
+            new_feasibles (List[CandidateSolution]): The new feasible solutions, not evaluated yet.
+            pops_size (int): The size of the population.
+
+        Returns:
+            List[CandidateSolution]: The new feasible solutions that still need to be evaluated.
+        """
+        if len(f_pool) <= pops_size or len(f_pool) - len(new_feasibles) < pops_size:
+            return new_feasibles
+        new_set = set(map(id, new_feasibles))
+        evaluated = (cs for cs in f_pool if id(cs) not in new_set)
+        threshold = heapq.nlargest(pops_size, evaluated, key=lambda cs: cs.c_fitness)[-1].c_fitness
+        max_c_fitness = self.max_fitness + self.nsc + _max_fitness_tolerance
+        to_evaluate = []
+        for cs in new_feasibles:
+            if max_c_fitness - cs.ncv < threshold:
+                del f_pool[cs]
+                cs._content = None
+                cs.invalidate_unique_blocks()
+            else:
+                to_evaluate.append(cs)
+        return to_evaluate
+
+    def _update_tracking(self,
+                         f_pop: List[CandidateSolution],
+                         i_pop: List[CandidateSolution]) -> None:
+        """Track the top and mean fitness of both populations.
+
+        Args:
+            f_pop (List[CandidateSolution]): The Feasible population.
+            i_pop (List[CandidateSolution]): The Infeasible population.
+        """
+        f_fitnesses = np.fromiter((cs.c_fitness for cs in f_pop), dtype=np.float64, count=len(f_pop))
+        i_fitnesses = np.fromiter((cs.c_fitness for cs in i_pop), dtype=np.float64, count=len(i_pop))
+        self.ftop.append(float(f_fitnesses.max()))
+        self.fmean.append(float(f_fitnesses.mean()))
+        self.itop.append(float(i_fitnesses.min()))
+        self.imean.append(float(i_fitnesses.mean()))
+        self.ffs.append([self.ftop[-1], self.fmean[-1]])
+        self.ifs.append([self.itop[-1], self.imean[-1]])
+
+    def _reduce_pool(self,
+                     pool: Dict[CandidateSolution, None],
+                     to: int = POP_SIZE,
+                     minimize: bool = False) -> Dict[CandidateSolution, None]:
+        """Reduce a pool to the population size.
+        Evicted solutions drop their structure, as they are only kept alive as parents of other solutions.
+
+        Args:
+            pool (Dict[CandidateSolution, None]): The pool, as an insertion-ordered set.
+            to (int, optional): The desired population size. Defaults to POP_SIZE.
+            minimize (bool, optional): Whether to keep the solutions with the lowest fitness. Defaults to False.
+
+        Returns:
+            Dict[CandidateSolution, None]: The reduced pool.
+        """
+        reduced = dict.fromkeys(reduce_population(population=list(pool),
+                                                  to=to,
+                                                  minimize=minimize))
+        for cs in pool:
+            if cs not in reduced:
+                cs._content = None
+                cs.invalidate_unique_blocks()
+        return reduced
 
     def _generate_initial_populations(self,
                                       pops_size: int = POP_SIZE,
@@ -66,27 +231,39 @@ class FI2PopSolver:
             Tuple[List[CandidateSolution], List[CandidateSolution]]: The Feasible and Infeasible populations.
         """
         feasible_pop, infeasible_pop = [], []
-        self.lsystem.disable_sat_check()
+        # populations sizes are tracked with running counters
+        n_feasible, n_infeasible = 0, 0
+        # strings already in each population, for constant-time duplicates checks
+        seen_f, seen_i = set(), set()
+        lsystem = self.lsystem
+        lsystem.disable_sat_check()
         with trange(n_retries, desc='FI-2Pop populations initialization ') as iterations:
-            for i in iterations:
-                solutions = self.lsystem.apply_rules(starting_strings=['head', 'body', 'tail'],
-                                                     iterations=[1, N_ITERATIONS, 1],
-                                                     create_structures=False,
-                                                     make_graph=False)
+            for _ in iterations:
+                solutions = lsystem.apply_rules(starting_strings=['head', 'body', 'tail'],
+                                                iterations=[1, N_ITERATIONS, 1],
+                                                create_structures=True,
+                                                make_graph=False)
                 subdivide_solutions(lcs=solutions,
-                                    lsystem=self.lsystem)
+                                    lsystem=lsystem)
+                new_feasibles = []
                 for cs in solutions:
-                    if cs.is_feasible and len(feasible_pop) < pops_size and cs not in feasible_pop:
+                    if n_feasible >= pops_size and n_infeasible >= pops_size:
+                        break
+                    if cs.is_feasible and n_feasible < pops_size and cs.string not in seen_f:
+                        seen_f.add(cs.string)
                         feasible_pop.append(cs)
-                        cs.fitness = self._compute_fitness(cs=cs)
-                        cs.c_fitness = sum(cs.fitness) + (self.nsc - cs.ncv)
-                    elif not cs.is_feasible and len(infeasible_pop) < pops_size and cs not in feasible_pop:
+                        new_feasibles.append(cs)
+                        n_feasible += 1
+                    elif not cs.is_feasible and n_infeasible < pops_size and cs.string not in seen_i:
+                        seen_i.add(cs.string)
                         cs.c_fitness = cs.ncv
                         infeasible_pop.append(cs)
-                iterations.set_postfix(ordered_dict={'fpop-size': f'{len(feasible_pop)}/{pops_size}',
-                                                     'ipop-size': f'{len(infeasible_pop)}/{pops_size}'},
-                                       refresh=True)
-                if i == n_retries or (len(feasible_pop) == pops_size and len(infeasible_pop) == pops_size):
+                        n_infeasible += 1
+                self._compute_fitnesses(lcs=new_feasibles)
+                iterations.set_postfix(ordered_dict={'fpop-size': f'{n_feasible}/{pops_size}',
+                                                     'ipop-size': f'{n_infeasible}/{pops_size}'},
+                                       refresh=False)
+                if n_feasible >= pops_size and n_infeasible >= pops_size:
                     break
         return feasible_pop, infeasible_pop
 
@@ -100,23 +277,82 @@ class FI2PopSolver:
         """
         f_pop, i_pop = self._generate_initial_populations(pops_size=pops_size,
                                                           n_retries=n_retries)
-        f_fitnesses = [cs.c_fitness for cs in f_pop]
-        i_fitnesses = [cs.c_fitness for cs in i_pop]
-        self.ftop.append(max(f_fitnesses))
-        self.fmean.append(sum(f_fitnesses) / len(f_fitnesses))
-        self.itop.append(min(i_fitnesses))
-        self.imean.append(sum(i_fitnesses) / len(i_fitnesses))
-        self.ffs.append([self.ftop[-1], self.fmean[-1]])
-        self.ifs.append([self.itop[-1], self.imean[-1]])
-        print(f'Created Feasible population of size {len(f_pop)}: t:{self.ftop[-1]};m:{self.fmean[-1]}')
-        print(f'Created Infeasible population of size {len(i_pop)}: t:{self.itop[-1]};m:{self.imean[-1]}')
+        self._update_tracking(f_pop=f_pop,
+                              i_pop=i_pop)
+        logging.getLogger('fi2pop').info(f'[{__name__}.initialize] Created Feasible population of size {len(f_pop)}: t:{self.ftop[-1]};m:{self.fmean[-1]}')
+        logging.getLogger('fi2pop').info(f'[{__name__}.initialize] Created Infeasible population of size {len(i_pop)}: t:{self.itop[-1]};m:{self.imean[-1]}')
         return f_pop, i_pop
 
+    def _evolve(self,
+                f_pool: Dict[CandidateSolution, None],
+                i_pool: Dict[CandidateSolution, None],
+                gen: int,
+                pops_size: int = POP_SIZE) -> Tuple[Dict[CandidateSolution, None], Dict[CandidateSolution, None], int]:
+        """Apply a single FI-2Pop generation to the given pools.
+
+        Args:
+            f_pool (Dict[CandidateSolution, None]): The Feasible pool, as an insertion-ordered set.
+            i_pool (Dict[CandidateSolution, None]): The Infeasible pool, as an insertion-ordered set.
+            gen (int): The current generation number.
+            pops_size (int, optional): The size of the populations. Defaults to POP_SIZE.
+
+        Returns:
+            Tuple[Dict[CandidateSolution, None], Dict[CandidateSolution, None], int]: The Feasible and Infeasible pools, and the number of new feasible solutions from infeasible parents.
+        """
+        # create offsprings from both populations
+        new_pool = []
+        if f_pool:
+            new_pool.extend(create_new_pool(population=list(f_pool),
+                                            generation=gen,
+                                            n_individuals=pops_size))
+        if i_pool:
+            new_pool.extend(create_new_pool(population=list(i_pool),
+                                            generation=gen,
+                                            n_individuals=pops_size,
+                                            minimize=True))
+        self._set_contents(lcs=new_pool)
+        # if feasible, add to feasible pool
+        # if infeasible, add to infeasible pool
+        subdivide_solutions(lcs=new_pool,
+                            lsystem=self.lsystem)
+        add_infeasible = i_pool.setdefault
+        new_feasibles, from_infeasibles = [], []
+        for cs in new_pool:
+            cs.age = CS_MAX_AGE
+            if cs.is_feasible:
+                if cs not in f_pool:
+                    f_pool[cs] = None
+                    new_feasibles.append(cs)
+                    if cs.parents and not cs.parents[0].is_feasible:
+                        from_infeasibles.append(cs)
+            else:
+                cs.c_fitness = cs.ncv
+                add_infeasible(cs)
+        # skip the evaluation of solutions that cannot make it into the feasible population
+        new_feasibles = self._prune_hopeless(f_pool=f_pool,
+                                             new_feasibles=new_feasibles,
+                                             pops_size=pops_size)
+        self._compute_fitnesses(lcs=new_feasibles)
+        # reduce the pools if > pops_size
+        if len(i_pool) > pops_size:
+            i_pool = self._reduce_pool(pool=i_pool,
+                                       to=pops_size,
+                                       minimize=True)
+        if len(f_pool) > pops_size:
+            f_pool = self._reduce_pool(pool=f_pool,
+                                       to=pops_size)
+        # count new feasible from infeasible solutions that survived the reduction
+        n_new_feas_infeas = sum(1 for cs in from_infeasibles if cs in f_pool)
+        for cs in f_pool:
+            cs.age -= 1
+        return f_pool, i_pool, n_new_feas_infeas
+
     def fi2pop(self,
                f_pop: List[CandidateSolution],
                i_pop: List[CandidateSolution],
                n_iter: int = N_GENS) -> Tuple[List[CandidateSolution], List[CandidateSolution]]:
         """Apply the FI2Pop algorithm to the given populations for `n_iter` steps.
+        The given populations are not modified in place; use the returned ones instead.
 
         Args:
             f_pop (List[CandidateSolution]): The Feasible population.
@@ -126,87 +362,110 @@ class FI2PopSolver:
         Returns:
             Tuple[List[CandidateSolution], List[CandidateSolution]]: The Feasible and the Infeasible populations.
         """
-        f_pool = []
-        i_pool = []
+        # pools are kept as insertion-ordered sets (dicts with `None` values),
+        # so duplicates are discarded on insertion instead of rehashing the whole pool
+        f_pool = dict.fromkeys(f_pop)
+        i_pool = dict.fromkeys(i_pop)
+        with trange(n_iter, desc='Generation ') as gens:
+            for gen in gens:
+                f_pool, i_pool, n_new_feas_infeas = self._evolve(f_pool=f_pool,
+                                                                 i_pool=i_pool,
+                                                                 gen=gen)
+                # set the pools as the populations
+                f_pop, i_pop = list(f_pool), list(i_pool)
+                # update tracking
+                self._update_tracking(f_pop=f_pop,
+                                      i_pop=i_pop)
+                self.perc_feas_infeas.append(n_new_feas_infeas / len(f_pop))
+
+                gens.set_postfix(ordered_dict={'top-f': self.ftop[-1],
+                                               'mean-f': self.fmean[-1],
+                                               'top-i': self.itop[-1],
+                                               'mean-i': self.imean[-1]},
+                                 refresh=False)
+
+        return f_pop, i_pop
+
+    def _migrate(self,
+                 islands: List[List[Dict[CandidateSolution, None]]],
+                 n_migrants: int,
+                 pops_size: int) -> None:
+        """Move the best solutions of each island to the next one (ring topology).
+
+        Args:
+            islands (List[List[Dict[CandidateSolution, None]]]): The Feasible and Infeasible pools of each island.
+            n_migrants (int): The number of solutions migrating from each population of each island.
+            pops_size (int): The size of the populations of each island.
+        """
+        emigrants = [(heapq.nlargest(n_migrants, f_pool, key=lambda cs: cs.c_fitness),
+                      heapq.nsmallest(n_migrants, i_pool, key=lambda cs: cs.c_fitness)) for f_pool, i_pool in islands]
+        for k, (f_emigrants, i_emigrants) in enumerate(emigrants):
+            f_src, i_src = islands[k]
+            f_dst, i_dst = islands[(k + 1) % len(islands)]
+            for cs in f_emigrants:
+                f_src.pop(cs)
+                f_dst.setdefault(cs)
+            for cs in i_emigrants:
+                i_src.pop(cs)
+                i_dst.setdefault(cs)
+        for island in islands:
+            if len(island[0]) > pops_size:
+                island[0] = self._reduce_pool(pool=island[0],
+                                              to=pops_size)
+            if len(island[1]) > pops_size:
+                island[1] = self._reduce_pool(pool=island[1],
+                                              to=pops_size,
+                                              minimize=True)
+
+    def island_fi2pop(self,
+                      f_pop: List[CandidateSolution],
+                      i_pop: List[CandidateSolution],
+                      n_iter: int = N_GENS,
+                      n_islands: int = 4,
+                      migration_interval: int = 5,
+                      n_migrants: int = 1) -> Tuple[List[CandidateSolution], List[CandidateSolution]]:
+        """Apply the FI2Pop algorithm with an island model to the given populations for `n_iter` steps.
+        The populations are split amongst `n_islands` islands that evolve independently, and every `migration_interval` generations
+        the best `n_migrants` solutions of each island move to the next one (ring topology).
+
+        Args:
+            f_pop (List[CandidateSolution]): The Feasible population.
+            i_pop (List[CandidateSolution]): The Infeasible population.
+            n_iter (int, optional): The number of iterations to run for. Defaults to N_GENS.
+            n_islands (int, optional): The number of islands. Defaults to 4.
+            migration_interval (int, optional): The number of generations between migrations. Defaults to 5.
+            n_migrants (int, optional): The number of migrating solutions per population. Defaults to 1.
+
+        Returns:
+            Tuple[List[CandidateSolution], List[CandidateSolution]]: The Feasible and the Infeasible populations.
+        """
+        pops_size = math.ceil(POP_SIZE / n_islands)
+        islands = [[dict.fromkeys(f_pop[k::n_islands]), dict.fromkeys(i_pop[k::n_islands])] for k in range(n_islands)]
         with trange(n_iter, desc='Generation ') as gens:
             for gen in gens:
-                # place the infeasible population in the infeasible pool
-                i_pool.extend(i_pop)
-                # place the feasible population in the feasible pool
-                f_pool.extend(f_pop)
-                # create offsprings from feasible population
-                new_pool = create_new_pool(population=f_pop,
-                                           generation=gen)
-                new_pool = [self.lsystem._set_structure(cs=self.lsystem._add_ll_strings(cs=cs)) for cs in new_pool]
-                # if feasible, add to feasible pool
-                # if infeasible, add to infeasible pool
-                subdivide_solutions(lcs=new_pool,
-                                    lsystem=self.lsystem)
-                for cs in new_pool:
-                    cs.age = CS_MAX_AGE
-                    if cs.is_feasible:
-                        f_pool.append(cs)
-                        cs.fitness = self._compute_fitness(cs=cs)
-                        cs.c_fitness = sum(cs.fitness) + (self.nsc - cs.ncv)
-                    else:
-                        cs.c_fitness = cs.ncv
-                        i_pool.append(cs)
-                i_pool = list(set(i_pool))
-                # reduce the infeasible pool if > pops_size
-                if len(i_pool) > POP_SIZE:
-                    i_pool = reduce_population(population=i_pool,
-                                               to=POP_SIZE,
-                                               minimize=True)
-                # set the infeasible pool as the infeasible population
-                i_pop[:] = i_pool[:]
-                # create offsprings from infeasible population
-                new_pool = create_new_pool(population=i_pop,
-                                           generation=gen,
-                                           minimize=True)
-                new_pool = [self.lsystem._set_structure(cs=self.lsystem._add_ll_strings(cs=cs)) for cs in new_pool]
-                # if feasible, add to feasible pool
-                # if infeasible, add to infeasible pool
-                subdivide_solutions(lcs=new_pool,
-                                    lsystem=self.lsystem)
-                for cs in new_pool:
-                    cs.age = CS_MAX_AGE
-                    if cs.is_feasible:
-                        f_pool.append(cs)
-                        cs.fitness = self._compute_fitness(cs=cs)
-                        cs.c_fitness = sum(cs.fitness) + (self.nsc - cs.ncv)
-                    else:
-                        cs.c_fitness = cs.ncv
-                        i_pool.append(cs)
-                f_pool = list(set(f_pool))
-                # reduce the feasible pool if > pops_size
-                if len(f_pool) > POP_SIZE:
-                    f_pool = reduce_population(population=f_pool,
-                                               to=POP_SIZE)
-                # set the feasible pool as the feasible population
-                f_pop[:] = f_pool[:]
-                # compute percentage of new feasible from infeasible solutions
                 n_new_feas_infeas = 0
-                for cs in f_pop:
-                    if cs.age == CS_MAX_AGE:
-                        if not cs.parents[0].is_feasible:
-                            n_new_feas_infeas += 1
-                    cs.age -= 1
-                n_new_feas_infeas /= len(f_pop)
+                for island in islands:
+                    island[0], island[1], n_new = self._evolve(f_pool=island[0],
+                                                               i_pool=island[1],
+                                                               gen=gen,
+                                                               pops_size=pops_size)
+                    n_new_feas_infeas += n_new
+                if n_islands > 1 and (gen + 1) % migration_interval == 0:
+                    self._migrate(islands=islands,
+                                  n_migrants=n_migrants,
+                                  pops_size=pops_size)
+                # merge the islands populations
+                f_pop = [cs for f_pool, _ in islands for cs in f_pool]
+                i_pop = [cs for _, i_pool in islands for cs in i_pool]
                 # update tracking
-                f_fitnesses = [cs.c_fitness for cs in f_pop]
-                i_fitnesses = [cs.c_fitness for cs in i_pop]
-                self.ftop.append(max(f_fitnesses))
-                self.fmean.append(sum(f_fitnesses) / len(f_fitnesses))
-                self.itop.append(min(i_fitnesses))
-                self.imean.append(sum(i_fitnesses) / len(i_fitnesses))
-                self.ffs.append([self.ftop[-1], self.fmean[-1]])
-                self.ifs.append([self.itop[-1], self.imean[-1]])
-                self.perc_feas_infeas.append(n_new_feas_infeas)
+                self._update_tracking(f_pop=f_pop,
+                                      i_pop=i_pop)
+                self.perc_feas_infeas.append(n_new_feas_infeas / len(f_pop))
 
                 gens.set_postfix(ordered_dict={'top-f': self.ftop[-1],
                                                'mean-f': self.fmean[-1],
                                                'top-i': self.itop[-1],
                                                'mean-i': self.imean[-1]},
-                                 refresh=True)
+                                 refresh=False)
 
         return f_pop, i_pop
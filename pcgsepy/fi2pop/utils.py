@@ -1,5 +1,6 @@
 from typing import List
 
+import heapq
 import logging
 import numpy as np
 
@@ -150,5 +151,6 @@ def reduce_population(population: List[CandidateSolution],
     Returns:
         List[CandidateSolution]: The ordered and culled population.
     """
-    population.sort(key=lambda x: x.c_fitness, reverse=not minimize)
-    return population[:to]
+    # equivalent to sorting and slicing, but O(N log to) and without reordering `population` in place
+    select = heapq.nsmallest if minimize else heapq.nlargest
+    return select(to, population, key=lambda x: x.c_fitness)
@@ -1700,6 +1700,7 @@ def _get_elite_content(mapelites: MAPElites,
             if elite.is_feasible:
                 if app_settings.current_mapelites.hull_builder is not None:
                     app_settings.current_mapelites.hull_builder.add_external_hull(structure=elite.content)
+                    elite.invalidate_unique_blocks()
             elite.string = original_string
             elite.content.set_color(elite.base_color)
             elite.content.rotate(along=1, k=3)
@@ -1932,9 +1933,10 @@ def _apply_step(mapelites: MAPElites,
         mapelites.n_new_solutions = 0
         logging.getLogger('webapp').debug(f'[{__name__}._apply_step] Started updating elites and reassigning content if needed...')
         # TODO: Parallelise if possible
-        mapelites.update_elites()
-        for (_, _), b in np.ndenumerate(mapelites.bins):
+        # update bins for elites and set the content of the elites, in a single sweep
+        for b in mapelites.bins.flat:
             for pop in ['feasible', 'infeasible']:
+                b.check_new_elite(pop=pop)
                 if b.non_empty(pop=pop):
                     e = b.get_elite(population=pop)
                     if e._content is None:
@@ -1957,7 +1959,7 @@ def _update_base_color(color: Vec) -> None:
     global app_settings
     logging.getLogger('webapp').debug(
         f'[{__name__}._update_base_color] {color=}')
-    for (_, _), b in np.ndenumerate(app_settings.current_mapelites.bins):
+    for b in app_settings.current_mapelites.bins.flat:
         for cs in [*b._feasible, *b._infeasible]:
             cs.base_color = color
             if cs._content is not None:
@@ -1996,10 +1998,11 @@ def __apply_step(**kwargs: Dict[str, Any]) -> Dict[str, Any]:
             app_settings.gen_counter += 1
             if app_settings.selected_bins:
                 rem_idxs = []
+                valid_bins = [b.bin_idx for b in app_settings.current_mapelites._valid_bins()]
                 for i, b in enumerate(app_settings.selected_bins):
                     # remove preview and properties if last selected bin is now invalid
                     lb = _switch([b])[0]
-                    if lb not in [b.bin_idx for b in app_settings.current_mapelites._valid_bins()]:
+                    if lb not in valid_bins:
                         rem_idxs.append(i)
                 for i in reversed(rem_idxs):
                     app_settings.selected_bins.pop(i)
@@ -1,15 +1,28 @@
 import logging
-from scipy.spatial import ConvexHull, Delaunay
-from scipy.ndimage import grey_erosion, binary_erosion, binary_dilation
+import re
+from scipy.spatial import ConvexHull
+from scipy.ndimage import grey_erosion, binary_erosion, binary_dilation, convolve, generate_binary_structure, label
 import numpy as np
 import numpy.typing as npt
 from pcgsepy.common.str_utils import get_matching_brackets
 from pcgsepy.common.vecs import Orientation, Vec, orientation_from_vec
 from pcgsepy.structure import Block, Structure, MountPoint
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple, Union
 from itertools import product
+from functools import lru_cache
+from bisect import bisect_left
 from pcgsepy.common.vecs import rotate, get_rotation_matrix
 from enum import IntEnum
+from joblib import Parallel, delayed
+from pcgsepy.config import USE_CUPY
+
+
+if USE_CUPY:
+    import cupy as cp
+    from cupyx.scipy.ndimage import binary_erosion as cp_binary_erosion, binary_dilation as cp_binary_dilation
+    
+    _gpu_morphology_ops = {binary_erosion: cp_binary_erosion,
+                           binary_dilation: cp_binary_dilation}
 
 
 class BlockValue(IntEnum):
@@ -33,6 +46,11 @@ block_value_types = {
 
 _orientations = [Orientation.FORWARD, Orientation.BACKWARD, Orientation.UP, Orientation.DOWN, Orientation.LEFT, Orientation.RIGHT]
 _valid_orientations = [(of, ou) for (of, ou) in list(product(_orientations, _orientations)) if of != ou and of != orientation_from_vec(ou.value.opposite())]
+_valid_orientations_idxs = {oo: i for i, oo in enumerate(_valid_orientations)}
+_orientations_tuples = [o.value.as_tuple() for o in _orientations]
+_neighbourhood_offsets = np.array(list(zip([1, 1, 1, 1, 1,  1,  1,   0, 0, 0, 0,  0,  0,  -1, -1, -1, -1, -1, -1, -1],
+                                  [0, 1, 0, 1, -1, 0,  -1,  1, 0, 1, -1, 0,  -1, 0,  1,  0,  1,  -1, 0,  -1],
+                                  [0, 0, 1, 1, 0,  -1, -1,  0, 1, 1, 0,  -1, -1, 0,  0,  1,  1,  0,  -1, -1])))
 # _smoothing_order = {
 #     BlockValue.BASE_BLOCK: [BlockValue.SLOPE_BLOCK, BlockValue.CORNERSQUARE_BLOCK, BlockValue.CORNER_BLOCK],
 #     BlockValue.CORNERSQUAREINV_BLOCK: [],
@@ -43,15 +61,157 @@ _smoothing_order = {
     BlockValue.BASE_BLOCK: [BlockValue.SLOPE_BLOCK],
     BlockValue.SLOPE_BLOCK: [BlockValue.CORNER_BLOCK]
     }
+# counts the 6 face-adjacent neighbours of a block
+_neighbours_kernel = generate_binary_structure(rank=3, connectivity=1).astype(np.uint8)
+_neighbours_kernel[1, 1, 1] = 0
+# side of the cubic tiles tested against the convex hull at once
+_hull_tile_size = 64
+# tolerance of the convex hull facets tests, so that voxels on the facets are included
+_hull_tolerance = 1e-9
+# mountpoints grouped by rotated face, for each (block type, forward, up)
+_mountpoints_by_face = {}
+# mountpoint limits, for each (block type, forward, up, face)
+_face_limits = {}
+# minimum number of voxels for binary morphology to run on the GPU (smaller arrays are faster on the CPU)
+_gpu_morphology_min_size = 1_000_000
+
+
+@lru_cache(maxsize=None)
+def _get_rotation_matrix(forward: Tuple[int, int, int],
+                         up: Tuple[int, int, int]) -> npt.NDArray[np.float32]:
+    """Compute the rotation matrix from the forward and up vectors, cached by their coordinates.
+
+    Args:
+        forward (Tuple[int, int, int]): The forward vector.
+        up (Tuple[int, int, int]): The up vector.
+
+    Returns:
+        npt.NDArray[np.float32]: The rotation matrix.
+    """
+    return get_rotation_matrix(forward=Vec.from_tuple(forward),
+                               up=Vec.from_tuple(up))
+
+
+@lru_cache(maxsize=None)
+def _get_rotated_face(forward: Tuple[int, int, int],
+                      up: Tuple[int, int, int],
+                      face: Tuple[int, int, int]) -> Vec:
+    """Rotate a mountpoint face normal by the rotation of the block, cached by their coordinates.
+
+    Args:
+        forward (Tuple[int, int, int]): The forward vector of the block.
+        up (Tuple[int, int, int]): The up vector of the block.
+        face (Tuple[int, int, int]): The face normal.
+
+    Returns:
+        Vec: The rotated face normal.
+    """
+    return rotate(rotation_matrix=_get_rotation_matrix(forward, up),
+                  vector=Vec.from_tuple(face))
+
+
+@lru_cache(maxsize=None)
+def _get_candidate_block(block_type: str,
+                         orientation_forward: Orientation,
+                         orientation_up: Orientation) -> Block:
+    """Get a block used to check a smoothing candidate, cached by block type and orientation.
+    The block is shared between calls, so it must not be modified or added to a structure.
+
+    Args:
+        block_type (str): The block type.
+        orientation_forward (Orientation): The forward orientation of the block.
+        orientation_up (Orientation): The up orientation of the block.
+
+    Returns:
+        Block: The candidate block.
+    """
+    return Block(block_type=block_type,
+                 orientation_forward=orientation_forward,
+                 orientation_up=orientation_up)
+
+
+def _binary_morphology(op,
+                       input: npt.NDArray,
+                       **kwargs) -> npt.NDArray[np.bool_]:
+    """Apply a SciPy binary morphology operation, on the GPU via CuPy if enabled and the array is large enough.
+
+    Args:
+        op: The SciPy operation.
+        input (npt.NDArray): The input array.
+
+    Returns:
+        npt.NDArray[np.bool_]: The result of the operation.
+    """
+    if USE_CUPY and input.size >= _gpu_morphology_min_size:
+        kwargs = {k: cp.asarray(v) if isinstance(v, np.ndarray) else v for k, v in kwargs.items()}
+        return cp.asnumpy(_gpu_morphology_ops[op](cp.asarray(input), **kwargs))
+    return op(input, **kwargs)
+
+
+def _binary_erosion(input: npt.NDArray,
+                    **kwargs) -> npt.NDArray[np.bool_]:
+    return _binary_morphology(binary_erosion, input, **kwargs)
+
+
+def _binary_dilation(input: npt.NDArray,
+                     **kwargs) -> npt.NDArray[np.bool_]:
+    return _binary_morphology(binary_dilation, input, **kwargs)
+
+
+def _get_bounding_box(arr: npt.NDArray,
+                      pad: int = 0) -> Optional[Tuple[slice, slice, slice]]:
+    """Get the bounding box of the non-zero elements of the array.
+
+    Args:
+        arr (npt.NDArray): The array.
+        pad (int, optional): The padding added on each side of the bounding box (clipped to the array). Defaults to 0.
+
+    Returns:
+        Optional[Tuple[slice, slice, slice]]: The slices of the bounding box, or `None` if the array has no non-zero elements.
+    """
+    nz = np.argwhere(arr)
+    if nz.size == 0:
+        return None
+    lo = np.maximum(nz.min(axis=0) - pad, 0)
+    hi = np.minimum(nz.max(axis=0) + pad + 1, arr.shape)
+    return tuple(slice(int(l), int(h)) for l, h in zip(lo, hi))
+
+
+def _get_mountpoints_by_face(block: Block) -> Dict[Orientation, List[MountPoint]]:
+    """Get the mountpoints of the block grouped by their (rotated) face, cached by block type and orientation.
+
+    Args:
+        block (Block): The block.
+
+    Returns:
+        Dict[Orientation, List[MountPoint]]: The mountpoints of each face.
+    """
+    of, ou = block.orientation_forward.as_tuple(), block.orientation_up.as_tuple()
+    key = (block.block_type, of, ou)
+    if key not in _mountpoints_by_face:
+        by_face = {}
+        for mp in block.mountpoints:
+            by_face.setdefault(orientation_from_vec(_get_rotated_face(of, ou, mp.face.as_tuple())), []).append(mp)
+        _mountpoints_by_face[key] = by_face
+    return _mountpoints_by_face[key]
 
 
 class HullBuilder:
-    __slots__ = ['available_erosion_types', 'erosion_type', 'erosion', 'footprint', 'iterations', 'apply_erosion', 'apply_smoothing', 'base_block', 'obstruction_targets', '_blocks_set']
+    __slots__ = ['available_erosion_types', 'erosion_type', 'erosion', 'footprint', 'iterations', 'apply_erosion', 'apply_smoothing', 'base_block', 'obstruction_targets', 'n_jobs', '_blocks_grid', '_blocks_mask']
     
     def __init__(self,
                  erosion_type: str,
                  apply_erosion: bool,
-                 apply_smoothing: bool):
+                 apply_smoothing: bool,
+                 n_jobs: int = 1):
+        """Create a hull builder.
+
+        Args:
+            erosion_type (str): The erosion type (either `'grey'` or `'bin'`).
+            apply_erosion (bool): Whether to apply erosion to the convex hull.
+            apply_smoothing (bool): Whether to apply smoothing to the hull.
+            n_jobs (int, optional): The number of threads used to check the hull blocks in each smoothing pass (`-1` uses all cores). With `1`, updates are visible to the following checks of the same pass; otherwise all checks of a pass see the hull at the start of the pass. Defaults to `1`.
+        """
         self.available_erosion_types = ['grey', 'bin']
         self.erosion_type = erosion_type
         assert self.erosion_type in self.available_erosion_types, f'Unrecognized erosion type {self.erosion_type}; available are {self.available_erosion_types}.'
@@ -82,7 +242,9 @@ class HullBuilder:
         
         self.base_block = 'MyObjectBuilder_CubeBlock_LargeBlockArmorBlock'
         self.obstruction_targets = ['window', 'thrust']
-        self._blocks_set = {}
+        self.n_jobs = n_jobs
+        self._blocks_grid = np.empty(shape=(0, 0, 0), dtype=object)
+        self._blocks_mask = np.zeros(shape=(0, 0, 0), dtype=bool)
     
     def _get_convex_hull(self,
                          arr: np.ndarray) -> np.ndarray:
@@ -96,11 +258,31 @@ class HullBuilder:
         """
         points = np.transpose(np.where(arr))
         hull = ConvexHull(points)
-        deln = Delaunay(points[hull.vertices])
-        idx = np.stack(np.indices(arr.shape), axis=-1)
-        out_idx = np.nonzero(deln.find_simplex(idx) + 1)
-        out_arr = np.zeros(arr.shape)
-        out_arr[out_idx] = BlockValue.BASE_BLOCK
+        # a voxel is in the hull if it lies on the inner side of all the hull's facets
+        normals, offsets = hull.equations[:, :3], hull.equations[:, 3]
+        # since the hull is convex, each (i, j) column intersects it in a single interval along k
+        # facets facing +k bound the interval from above, facets facing -k from below, and the others accept or reject the whole column
+        upper, lower = normals[:, 2] > 0, normals[:, 2] < 0
+        flat = ~(upper | lower)
+        out_arr = np.zeros(arr.shape, dtype=np.uint8)
+        # only voxels within the bounding box of the points can be in the hull
+        mins, maxs = points.min(axis=0), points.max(axis=0) + 1
+        ks = np.arange(mins[2], maxs[2])
+        # process the columns in tiles to bound the memory of the (columns, facets) terms
+        tile = _hull_tile_size
+        for i0 in range(mins[0], maxs[0], tile):
+            for j0 in range(mins[1], maxs[1], tile):
+                ii, jj = np.meshgrid(np.arange(i0, min(i0 + tile, maxs[0])),
+                                     np.arange(j0, min(j0 + tile, maxs[1])),
+                                     indexing='ij')
+                # facet terms not depending on k, shape (I, J, F)
+                rest = _hull_tolerance - (ii[..., None] * normals[:, 0] + jj[..., None] * normals[:, 1] + offsets)
+                bounds = rest / np.where(flat, 1., normals[:, 2])
+                k_max = np.floor(np.min(bounds[..., upper], axis=-1, initial=np.inf))
+                k_min = np.ceil(np.max(bounds[..., lower], axis=-1, initial=-np.inf))
+                valid = np.all(rest[..., flat] >= 0, axis=-1)
+                in_hull = (ks >= k_min[..., None]) & (ks <= k_max[..., None]) & valid[..., None]
+                out_arr[ii[0, 0]:ii[-1, 0] + 1, jj[0, 0]:jj[0, -1] + 1, mins[2]:maxs[2]][in_hull] = BlockValue.BASE_BLOCK
         return out_arr
            
     def _add_block(self,
@@ -122,7 +304,41 @@ class HullBuilder:
                       orientation_forward=orientation_forward,
                       orientation_up=orientation_up)
         block.position = pos
-        self._blocks_set[idx] = block
+        self._blocks_grid[idx] = block
+        self._blocks_mask[idx] = True
+    
+    def _remove_blocks(self,
+                       idxs: Union[Tuple[int, int, int], Tuple[npt.NDArray[np.int64], ...], npt.NDArray[np.bool_]]) -> None:
+        """Remove blocks from the hull.
+
+        Args:
+            idxs (Union[Tuple[int, int, int], Tuple[npt.NDArray[np.int64], ...], npt.NDArray[np.bool_]]): The index, indices or mask of the blocks to remove.
+        """
+        self._blocks_grid[idxs] = None
+        self._blocks_mask[idxs] = False
+    
+    def _get_hull_block(self,
+                        idx: Tuple[int, int, int]) -> Optional[Block]:
+        """Get the hull block at the given index.
+
+        Args:
+            idx (Tuple[int, int, int]): The index (hull-scaled).
+
+        Returns:
+            Optional[Block]: The hull block, if it exists.
+        """
+        i, j, k = idx
+        if 0 <= i < self._blocks_grid.shape[0] and 0 <= j < self._blocks_grid.shape[1] and 0 <= k < self._blocks_grid.shape[2]:
+            return self._blocks_grid[i, j, k]
+        return None
+    
+    def _get_hull_indices(self) -> List[Tuple[int, int, int]]:
+        """Get the indices of all hull blocks.
+
+        Returns:
+            List[Tuple[int, int, int]]: The indices of the hull blocks.
+        """
+        return list(map(tuple, np.argwhere(self._blocks_mask).tolist()))
         
     def _exists_block(self,
                       idx: Tuple[int, int, int],
@@ -140,12 +356,12 @@ class HullBuilder:
     
     def _within_hull(self,
                      loc: Vec,
-                     hull: npt.NDArray[np.float32]) -> bool:
+                     hull: npt.NDArray[np.uint8]) -> bool:
         """Check if a block exists within the hull.
 
         Args:
             loc (Vec): The index to check at.
-            hull (npt.NDArray[np.float32]): The hull array.
+            hull (npt.NDArray[np.uint8]): The hull array.
 
         Returns:
             bool: Whether the block is within the hull.
@@ -156,13 +372,13 @@ class HullBuilder:
     def _is_air_block(self,
                       loc: Vec,
                       structure: Structure,
-                      hull: np.typing.NDArray[np.float32]) -> bool:
+                      hull: np.typing.NDArray[np.uint8]) -> bool:
         """Check if the block is an air block.
 
         Args:
             loc (Vec): The index to check at.
             structure (Structure): The structure.
-            hull (np.typing.NDArray[np.float32]): The hull array.
+            hull (np.typing.NDArray[np.uint8]): The hull array.
 
         Returns:
             bool: Whether the block is an air block.
@@ -171,146 +387,132 @@ class HullBuilder:
             (self._within_hull(loc=loc.scale(1 / structure.grid_size).to_veci(), hull=hull) and hull[loc.scale(1 / structure.grid_size).to_veci().as_tuple()] == BlockValue.AIR_BLOCK)
     
     def _next_to_target(self,
-                        loc: Vec,
-                        structure: Structure,
-                        direction: Vec) -> bool:
+                        loc: Tuple[int, int, int],
+                        direction: Tuple[int, int, int],
+                        targets: Set[Tuple[int, int, int]]) -> bool:
         """Check if the block is next to a target block along a direction.
 
         Args:
-            loc (Vec): The index to check at.
-            structure (Structure): The structure.
-            direction (Vec): The direction to check at.
+            loc (Tuple[int, int, int]): The index to check at.
+            direction (Tuple[int, int, int]): The direction to check at.
+            targets (Set[Tuple[int, int, int]]): The positions of the target blocks in the structure.
 
         Returns:
             bool: Whether the block is next to a target block.
         """
-        dloc = loc.sum(direction)
-        if self._exists_block(idx=dloc.as_tuple(), structure=structure):
-            obs_block = structure._blocks.get(dloc.as_tuple())
-            return any([target.lower() in obs_block.block_type.lower() for target in self.obstruction_targets])
+        return (loc[0] + direction[0], loc[1] + direction[1], loc[2] + direction[2]) in targets
     
     def _remove_in_direction(self,
-                             loc: Vec,
-                             hull: npt.NDArray[np.float32],
-                             direction: Vec) -> npt.NDArray[np.float32]:
+                             loc: Tuple[int, int, int],
+                             hull: npt.NDArray[np.uint8],
+                             direction: Tuple[int, int, int]) -> npt.NDArray[np.uint8]:
         """Remove all blocks in the hull along a direction.
 
         Args:
-            loc (Vec): The starting index.
-            hull (npt.NDArray[np.float32]): The hull array.
-            direction (Vec): The direction to remove along to.
+            loc (Tuple[int, int, int]): The starting index.
+            hull (npt.NDArray[np.uint8]): The hull array.
+            direction (Tuple[int, int, int]): The direction to remove along to.
 
         Returns:
-            npt.NDArray[np.float32]: The modified hull.
+            npt.NDArray[np.uint8]: The modified hull.
         """
-        i, j, k = loc.as_tuple()
-        di, dj, dk = direction.as_tuple()
-        # TODO: improve if needed
-        while 0 < i < hull.shape[0] and 0 < j < hull.shape[1] and 0 < k < hull.shape[2]:
-            hull[i, j, k] = BlockValue.AIR_BLOCK
-            i += di
-            j += dj
-            k += dk
-            if (i, j, k) in self._blocks_set.keys():
-                self._blocks_set.pop((i, j, k))
+        # all positions along the ray, up to and including the first one outside the hull
+        steps = np.arange(max(hull.shape) + 1)[:, None]
+        ray = np.array(loc) + steps * np.array(direction)
+        within = np.all((ray > 0) & (ray < hull.shape), axis=1)
+        n = int(np.argmin(within))
+        hull[tuple(ray[:n].T)] = BlockValue.AIR_BLOCK
+        removed = ray[1:n + 1]
+        removed = removed[np.all((removed >= 0) & (removed < hull.shape), axis=1)]
+        self._remove_blocks(idxs=tuple(removed.T))
         return hull
     
     def _remove_obstructing_blocks(self,
-                                   hull: npt.NDArray[np.float32],
-                                   structure: Structure) -> npt.NDArray[np.float32]:
+                                   hull: npt.NDArray[np.uint8],
+                                   structure: Structure) -> npt.NDArray[np.uint8]:
         """Remove the blocks obstructing a target block.
 
         Args:
-            hull (npt.NDArray[np.float32]): The hull array.
+            hull (npt.NDArray[np.uint8]): The hull array.
             structure (Structure): The structure.
 
         Returns:
-            npt.NDArray[np.float32]: The modified hull array.
+            npt.NDArray[np.uint8]: The modified hull array.
         """
         scale = structure.grid_size
-        for (i, j, k) in list(self._blocks_set.keys()):
+        obstruction_targets = [target.lower() for target in self.obstruction_targets]
+        targets = {pos for pos, block in structure._blocks.items() if any(target in block.block_type.lower() for target in obstruction_targets)}
+        # only hull blocks next to a target can be obstructing, so find them on a padded grid of the targets first
+        targets_grid = np.zeros(shape=tuple(n + 2 for n in hull.shape), dtype=bool)
+        for pos in targets:
+            idx = tuple(x // scale + 1 for x in pos)
+            if all(x % scale == 0 for x in pos) and all(0 <= x < n for x, n in zip(idx, targets_grid.shape)):
+                targets_grid[idx] = True
+        next_to_targets = np.zeros(shape=hull.shape, dtype=bool)
+        for (di, dj, dk) in _orientations_tuples:
+            next_to_targets |= targets_grid[1 + di:1 + di + hull.shape[0], 1 + dj:1 + dj + hull.shape[1], 1 + dk:1 + dk + hull.shape[2]]
+        for (i, j, k) in [idx for idx in self._get_hull_indices() if next_to_targets[idx]]:
             if hull[i, j, k] != BlockValue.AIR_BLOCK:  # skip removed blocks
-                loc = Vec.from_tuple((scale * i, scale * j, scale * k))
-                for direction in _orientations:
+                loc = (scale * i, scale * j, scale * k)
+                for (di, dj, dk) in _orientations_tuples:
                     ntt = self._next_to_target(loc=loc,
-                                               structure=structure,
-                                               direction=direction.value.scale(scale))
+                                               direction=(scale * di, scale * dj, scale * dk),
+                                               targets=targets)
                     if ntt:
                         hull[i, j, k] = BlockValue.AIR_BLOCK
-                        self._blocks_set.pop((i, j, k))
-                        hull = self._remove_in_direction(loc=loc.scale(v=1 / structure.grid_size).to_veci(),
-                                                            hull=hull,
-                                                            direction=direction.value.opposite())
+                        self._remove_blocks(idxs=(i, j, k))
+                        hull = self._remove_in_direction(loc=(i, j, k),
+                                                         hull=hull,
+                                                         direction=(-di, -dj, -dk))
                         break
         return hull
     
     def _remove_floating_blocks(self,
-                                hull: npt.NDArray[np.float32],
+                                hull: npt.NDArray[np.uint8],
                                 structure: Structure,
-                                pivot_blocktype: str = 'MyObjectBuilder_Cockpit_OpenCockpitLarge') -> npt.NDArray[np.float32]:
+                                pivot_blocktype: str = 'MyObjectBuilder_Cockpit_OpenCockpitLarge') -> npt.NDArray[np.uint8]:
         """Remove floating blocks from the hull. Floating blocks are blocks not connected to the spaceship.
         These may appear when removing obstructing blocks.
 
         Args:
-            hull (npt.NDArray[np.float32]): The hull array.
+            hull (npt.NDArray[np.uint8]): The hull array.
             structure (Structure): The structure.
             pivot_blocktype (str): The pivot block type. Defaults to 'MyObjectBuilder_Cockpit_OpenCockpitLarge'.
 
         Returns:
-            npt.NDArray[np.float32]: The modified hull array.
+            npt.NDArray[np.uint8]: The modified hull array.
         """
         structure_arr = structure.as_grid_array
-        structure_shape = Vec.from_tuple(structure_arr.shape)
         # mask of all blocks
         mask = np.zeros_like(structure_arr, dtype=np.uint8)
-        mask[np.nonzero(hull)] = BlockValue.BASE_BLOCK
-        mask[np.nonzero(structure_arr)] = BlockValue.BASE_BLOCK
+        np.putmask(mask, np.logical_or(hull, structure_arr), BlockValue.BASE_BLOCK)
         # pivot position defines the region to keep
         pivot_position = [x for x in structure._blocks.values() if x.block_type == pivot_blocktype][0].position
         pivot_idx = pivot_position.scale(1 / structure.grid_size).to_veci().as_tuple()
         # get the region to keep defined by blocks connected to pivot position
-        connected_blocks = set()
-        to_check = [pivot_idx]
-        while to_check:
-            to_add = set()
-            for block_position in to_check:
-                if mask[block_position] == BlockValue.BASE_BLOCK:
-                    connected_blocks.add(block_position)
-                    for direction in _orientations:
-                        dpos = Vec.from_tuple(block_position).sum(direction.value)
-                        if 0 <= dpos.x < structure_shape.x and 0 <= dpos.y < structure_shape.y and 0 <= dpos.z < structure_shape.z:
-                            to_add.add(dpos.as_tuple())
-            to_add = to_add.difference(to_add.intersection(connected_blocks))
-            to_check = list(to_add)
-        # disconnected blocks are the difference between all blocks and blocks connected to pivot block
-        disconnected_blocks = set(self._blocks_set.keys()) - connected_blocks
+        labels, _ = label(mask)
+        connected = labels == labels[pivot_idx]
+        # disconnected blocks are hull blocks not connected to pivot block
+        disconnected_blocks = (hull != BlockValue.AIR_BLOCK) & ~connected
         # remove disconnected blocks
-        for block_idx in disconnected_blocks:
-            hull[block_idx] = BlockValue.AIR_BLOCK
-            self._blocks_set.pop(block_idx)
+        hull[disconnected_blocks] = BlockValue.AIR_BLOCK
+        self._remove_blocks(idxs=disconnected_blocks)
         return hull
     
     def _get_outer_indices(self,
-                           arr: npt.NDArray[np.float32],
                            edges_only: bool = False,
                            corners_only: bool = False) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64]]:
-        """Get the indices of blocks lying on the outer corner/edges/faces of the array.
+        """Get the indices of hull blocks lying on the outer corner/edges/faces of the hull.
 
         Args:
-            arr (npt.NDArray[np.float32]): The array.
             edges_only (bool, optional): Get blocks on the edges only. Defaults to False.
             corners_only (bool, optional): Get blocks on the corners only. Defaults to False.
 
         Returns:
             Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64]]: The indices of the outer blocks.
         """
-        n_neighbours = np.zeros_like(arr)
-        for idx, _ in np.ndenumerate(arr):
-            if self._blocks_set.get(idx, None):
-                for offset in _orientations:
-                    pos = Vec.from_tuple(idx).sum(offset.value).as_tuple()
-                    if self._blocks_set.get(pos, None):
-                        n_neighbours[idx] = n_neighbours[idx] + 1
+        occupied = self._blocks_mask.astype(np.uint8)
+        n_neighbours = convolve(occupied, _neighbours_kernel, mode='constant', cval=0) * occupied
         if corners_only:
             return np.nonzero(np.where(n_neighbours < 2, n_neighbours, 0))
         elif edges_only:
@@ -320,23 +522,6 @@ class HullBuilder:
         else:
             return np.nonzero(n_neighbours)
     
-    def adj_in_hull(self,
-                    idx: Tuple[int, int, int]) -> List[Tuple[int, int, int]]:
-        """Get the indices of adjacent blocks in the hull from a given index.
-
-        Args:
-            idx (Tuple[int, int, int]): The index.
-
-        Returns:
-            List[Tuple[int, int, int]]: The list of adjacent indices.
-        """
-        adjs = []
-        for direction in _orientations:
-            new_idx = Vec.from_tuple(idx).sum(direction.value).as_tuple()
-            if new_idx in self._blocks_set.keys():
-                adjs.append(new_idx)
-        return adjs          
-    
     def _get_neighbourhood(self,
                            idx: Vec,
                            structure: Structure) -> List[Block]:
@@ -349,17 +534,18 @@ class HullBuilder:
         Returns:
             List[Block]: The neighbourhood of the block.
         """
+        # fetch all hull neighbours at once
+        neighbours_idxs = np.array(idx) + _neighbourhood_offsets
+        within = np.all((neighbours_idxs >= 0) & (neighbours_idxs < self._blocks_grid.shape), axis=1)
+        hull_blocks = np.empty(shape=len(neighbours_idxs), dtype=object)
+        hull_blocks[within] = self._blocks_grid[tuple(neighbours_idxs[within].T)]
+        # structure blocks take precedence over hull blocks
+        scale = structure.grid_size
         n = []
-        for di, dj, dk in zip([1, 1, 1, 1, 1,  1,  1,   0, 0, 0, 0,  0,  0,  -1, -1, -1, -1, -1, -1, -1],
-                              [0, 1, 0, 1, -1, 0,  -1,  1, 0, 1, -1, 0,  -1, 0,  1,  0,  1,  -1, 0,  -1],
-                              [0, 0, 1, 1, 0,  -1, -1,  0, 1, 1, 0,  -1, -1, 0,  0,  1,  1,  0,  -1, -1]):
-            offset = Vec(di, dj, dk).scale(structure.grid_size)
-            if not offset.is_zero:
-                adj = self.try_and_get_block(idx=idx,
-                                             offset=offset,
-                                             structure=structure)
-                if adj:
-                    n.append(adj)
+        for (i, j, k), hull_block in zip(neighbours_idxs.tolist(), hull_blocks):
+            adj = structure._blocks.get((scale * i, scale * j, scale * k), hull_block)
+            if adj:
+                n.append(adj)
         return n
     
     def try_and_get_block(self,
@@ -376,42 +562,55 @@ class HullBuilder:
         Returns:
             Optional[Block]: The block at `idx + offset`, if it exists.
         """
-        dloc = Vec.from_tuple(idx).scale(structure.grid_size).sum(offset)
-        if self._exists_block(idx=dloc.as_tuple(),
-                              structure=structure):
-            return structure._blocks[dloc.as_tuple()]
-        else:
-            return self._blocks_set.get(Vec.from_tuple(idx).sum(offset.scale(1 / structure.grid_size)).to_veci().as_tuple(), None)
+        scale = structure.grid_size
+        return self._get_block_at(idx=idx,
+                                  offset=(int(round(offset.x / scale)), int(round(offset.y / scale)), int(round(offset.z / scale))),
+                                  structure=structure)
+    
+    def _get_block_at(self,
+                      idx: Tuple[int, int, int],
+                      offset: Tuple[int, int, int],
+                      structure: Structure) -> Optional[Block]:
+        """Get a block from either the structure or the hull.
+
+        Args:
+            idx (Tuple[int, int, int]): The index of the block (hull-scaled).
+            offset (Tuple[int, int, int]): The offset (hull-scaled).
+            structure (Structure): The structure.
+
+        Returns:
+            Optional[Block]: The block at `idx + offset`, if it exists.
+        """
+        i, j, k = idx[0] + offset[0], idx[1] + offset[1], idx[2] + offset[2]
+        scale = structure.grid_size
+        block = structure._blocks.get((scale * i, scale * j, scale * k), None)
+        return block if block is not None else self._get_hull_block(idx=(i, j, k))
     
     def _correct_and_centered_rotation(self,
-                                       center: Vec,
+                                       center: npt.NDArray[np.float32],
                                        rotation_matrix: np.typing.NDArray,
-                                       vector: Vec) -> Vec:
-        """Rotate correctly and center the vector to the center of the block.
+                                       vectors: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+        """Rotate correctly and center the vectors to the center of the block.
 
         Args:
-            center (Vec): The center of the block.
+            center (npt.NDArray[np.float32]): The center of the block.
             rotation_matrix (np.typing.NDArray): The rotation matrix of the block.
-            vector (Vec): The vector to rotate and center.
+            vectors (npt.NDArray[np.float32]): The vectors to rotate and center, one per row.
 
         Returns:
-            Vec: The rotated and centered vector.
+            npt.NDArray[np.float32]: The rotated and centered vectors.
         """
         # Rotation with additional checking as in Space Engineers source code.
-        centered_vector = vector.diff(center)
-        centered_vector_i = centered_vector.floor()
-        rotated_vector = rotate(rotation_matrix=rotation_matrix,
-                                vector=centered_vector)
-        rotated_vector_i_correct = rotate(rotation_matrix=rotation_matrix,
-                                          vector=centered_vector_i)
-        rotated_vector_i = rotated_vector.floor()
-        correction = rotated_vector_i_correct.diff(rotated_vector_i)
-        return rotated_vector.sum(correction)
+        centered_vectors = vectors - center
+        rotated_vectors = centered_vectors @ rotation_matrix.T
+        rotated_vectors_i_correct = np.floor(centered_vectors) @ rotation_matrix.T
+        correction = rotated_vectors_i_correct - np.floor(rotated_vectors)
+        return rotated_vectors + correction
     
     def _get_mountpoint_limits(self,
                                mountpoints: List[MountPoint],
                                block_center: Vec,
-                               rotation_matrix: npt.NDArray[np.float32]) -> Tuple[List[Vec], List[Vec], List[int]]:
+                               rotation_matrix: npt.NDArray[np.float32]) -> Tuple[npt.NDArray[np.float32], npt.NDArray[np.float32], npt.NDArray[np.float32]]:
         """Get the start and end vectors of the mountpoint, as well as the face area(s).
 
         Args:
@@ -420,110 +619,106 @@ class HullBuilder:
             rotation_matrix (npt.NDArray[np.float32]): The rotation matrix of the block.
 
         Returns:
-            Tuple[List[Vec], List[Vec], List[int]]: The start and end vector, and the face area(s).
+            Tuple[npt.NDArray[np.float32], npt.NDArray[np.float32], npt.NDArray[np.float32]]: The start and end vectors (one per row), and the face area(s).
         """
-        starts, ends = [], []
-        for mp in mountpoints:
-            rotated_start = self._correct_and_centered_rotation(center=block_center,
-                                                                rotation_matrix=rotation_matrix,
-                                                                vector=mp.start)
-            rotated_end = self._correct_and_centered_rotation(center=block_center,
-                                                              rotation_matrix=rotation_matrix,
-                                                              vector=mp.end)
-
-            ordered_start = Vec.min(rotated_start, rotated_end)
-            ordered_end = Vec.max(rotated_start, rotated_end)
-            
-            starts.append(ordered_start)
-            ends.append(ordered_end)
-        
-        planes = [end.diff(start).bbox(ignore_zero=False) for start, end in zip(starts, ends)]
+        # rotate starts and ends together
+        limits = np.array([mp.start.as_tuple() for mp in mountpoints] + [mp.end.as_tuple() for mp in mountpoints], dtype=np.float64).reshape(-1, 3)
+        rotated_limits = self._correct_and_centered_rotation(center=block_center.as_array(),
+                                                             rotation_matrix=rotation_matrix,
+                                                             vectors=limits)
+        rotated_starts, rotated_ends = rotated_limits[:len(mountpoints)], rotated_limits[len(mountpoints):]
+        starts = np.minimum(rotated_starts, rotated_ends)
+        ends = np.maximum(rotated_starts, rotated_ends)
+        # bounding box area of each mountpoint, ignoring flat dimensions
+        sizes = ends - starts
+        planes = np.where(np.all(sizes == 0, axis=1), 0, np.prod(np.where(sizes != 0, sizes, 1), axis=1))
         
         return starts, ends, planes
     
     def intersect_planes(self,
-                         starts1: List[Vec],
-                         ends1: List[Vec],
-                         starts2: List[Vec],
-                         ends2: List[Vec]) -> float:
+                         starts1: npt.NDArray[np.float32],
+                         ends1: npt.NDArray[np.float32],
+                         starts2: npt.NDArray[np.float32],
+                         ends2: npt.NDArray[np.float32]) -> float:
         """Compute the intersection surface between mountpoints of different blocks and return the inverse of the intersection as an error to minimize.
 
         Args:
-            starts1 (List[Vec]): The start vectors of the first block.
-            ends1 (List[Vec]): The end vectors of the first block.
-            starts2 (List[Vec]): The start vectors of the second block.
-            ends2 (List[Vec]): The end vectors of the first block.
+            starts1 (npt.NDArray[np.float32]): The start vectors of the first block.
+            ends1 (npt.NDArray[np.float32]): The end vectors of the first block.
+            starts2 (npt.NDArray[np.float32]): The start vectors of the second block.
+            ends2 (npt.NDArray[np.float32]): The end vectors of the first block.
 
         Returns:
             float: The intersection as an error.
         """
-        intersect_bbox = 0.
-        for start1, end1 in zip(starts1, ends1):
-            for start2, end2 in zip(starts2, ends2):
-                x1 = max(start1.x, start2.x)
-                y1 = max(start1.y, start2.y)
-                z1 = max(start1.z, start2.z)
-                x2 = min(end1.x, end2.x)
-                y2 = min(end1.y, end2.y)
-                z2 = min(end1.z, end2.z)
-                if x2 > x1 and y2 > y1 and z2 < z1:
-                    intersect_bbox += (x2 - x1) * (y2 - y1)
-                elif x2 > x1 and y2 <= y1 and z2 > z1:
-                    intersect_bbox += (x2 - x1) * (z2 - z1)
-                elif x2 <= x1 and y2 > y1 and z2 > z1:
-                    intersect_bbox += (y2 - y1) * (z2 - z1)
-                else:
-                    intersect_bbox += 0
+        # pairwise intersection of the mountpoints bounding boxes
+        d = np.minimum(ends1[:, None, :], ends2[None, :, :]) - np.maximum(starts1[:, None, :], starts2[None, :, :])
+        dx, dy, dz = d[..., 0], d[..., 1], d[..., 2]
+        intersect_bbox = np.where((dx > 0) & (dy > 0) & (dz < 0), dx * dy, 0) + \
+            np.where((dx > 0) & (dy <= 0) & (dz > 0), dx * dz, 0) + \
+            np.where((dx <= 0) & (dy > 0) & (dz > 0), dy * dz, 0)
+        intersect_bbox = float(intersect_bbox.sum())
         return 1 / intersect_bbox
     
+    def _get_face_limits(self,
+                         block: Block,
+                         face: Orientation) -> Tuple[npt.NDArray[np.float32], npt.NDArray[np.float32], npt.NDArray[np.float32]]:
+        """Get the mountpoint limits of a face of the block, cached by block type, orientation and face.
+
+        Args:
+            block (Block): The block.
+            face (Orientation): The (rotated) face.
+
+        Returns:
+            Tuple[npt.NDArray[np.float32], npt.NDArray[np.float32], npt.NDArray[np.float32]]: The start and end vectors (one per row), and the face area(s).
+        """
+        key = (block.block_type, block.orientation_forward.as_tuple(), block.orientation_up.as_tuple(), face)
+        if key not in _face_limits:
+            _face_limits[key] = self._get_mountpoint_limits(mountpoints=_get_mountpoints_by_face(block).get(face, []),
+                                                            block_center=block.center,
+                                                            rotation_matrix=_get_rotation_matrix(key[1], key[2]))
+        return _face_limits[key]
+    
     def _check_valid_placement(self,
-                               idx: Tuple[int, int, int],
                                block: Block,
                                direction: Orientation,
-                               structure: Structure) -> Tuple[bool, int]:
+                               other_block: Optional[Block]) -> Tuple[bool, int]:
         """Check if the block could be placed with the given orientation when checking in the specified direction.
 
         Args:
-            idx (Tuple[int, int, int]): The index of the block (hull-scaled).
             block (Block): The block to be checked.
             direction (Orientation): The direction to check placement for.
-            structure (Structure): The structure.
+            other_block (Optional[Block]): The block adjacent along the direction, if any.
 
         Returns:
             bool: Whether the block could be placed with the given orientation when checking in the specified direction.
         """
-        rot_mat = get_rotation_matrix(forward=block.orientation_forward,
-                                      up=block.orientation_up)
-        mp1 = [mp for mp in block.mountpoints if rotate(rot_mat, mp.face) == direction.value]
-        starts1, ends1, planes1 = self._get_mountpoint_limits(mountpoints=mp1,
-                                                              block_center=block.center,
-                                                              rotation_matrix=rot_mat)
-        other_block = self.try_and_get_block(idx=idx,
-                                             offset=direction.value.scale(structure.grid_size).to_veci(),
-                                             structure=structure)
+        mp1 = _get_mountpoints_by_face(block).get(direction, [])
         opposite_direction = orientation_from_vec(direction.value.opposite())
         if other_block is None:
             if mp1 == []:
-                mp2 = [mp for mp in block.mountpoints if rotate(rot_mat, mp.face) == opposite_direction.value]
-                _, _, planes2 = self._get_mountpoint_limits(mountpoints=mp2,
-                                                            block_center=block.center,
-                                                            rotation_matrix=rot_mat)
+                mp2 = _get_mountpoints_by_face(block).get(opposite_direction, [])
+                if mp2 == []:
+                    return True, 0
+                _, _, planes2 = self._get_face_limits(block=block,
+                                                      face=opposite_direction)
                 val = sum(planes2)  # error as the surface of mountpoints on opposite face
             else:
+                _, _, planes1 = self._get_face_limits(block=block,
+                                                      face=direction)
                 val = sum(planes1)  # erorr as surface of mountpoints of current face
             return True, val
         else:
             if mp1 == []:
                 return False, 0
             else:
-                rot_mat_other = get_rotation_matrix(forward=other_block.orientation_forward,
-                                                    up=other_block.orientation_up)
-                mp2 = [mp for mp in other_block.mountpoints if rotate(rot_mat_other, mp.face) == opposite_direction.value]
+                mp2 = _get_mountpoints_by_face(other_block).get(opposite_direction, [])
                 if mp2 == []:
                     return False, 0
-                starts2, ends2, planes2 = self._get_mountpoint_limits(mountpoints=mp2,
-                                                                      block_center=other_block.center,
-                                                                      rotation_matrix=rot_mat_other)
+                starts1, ends1, planes1 = self._get_face_limits(block=block,
+                                                                face=direction)
+                starts2, ends2, planes2 = self._get_face_limits(block=other_block,
+                                                                face=opposite_direction)
                 all_valid = []
                 for eo1, so1, p1 in zip(ends1, starts1, planes1):
                     assert p1 != 0, f'Mountpoint with empty surface: {mp1} has {so1}-{eo1} (from block {block})'
@@ -533,48 +728,70 @@ class HullBuilder:
                         # NOTE: This check does not take into account exclusions and properties masks (yet)
                         # Sources\VRage.Math\BoundingBoxI.cs#328
                         # (double)this.Max.X >= (double)box.Min.X && (double)this.Min.X <= (double)box.Max.X && ((double)this.Max.Y >= (double)box.Min.Y && (double)this.Min.Y <= (double)box.Max.Y) && ((double)this.Max.Z >= (double)box.Min.Z && (double)this.Min.Z <= (double)box.Max.Z);
-                        mp_valid |= eo1.x >= so2.x and so1.x <= eo2.x and eo1.y >= so2.y and so1.y <= eo2.y and eo1.z >= so2.z and so1.z <= eo2.z
+                        mp_valid |= bool(np.all(eo1 >= so2) and np.all(so1 <= eo2))
                     all_valid.append(mp_valid)
                 return all(all_valid), self.intersect_planes(starts1, ends1, starts2, ends2)
         
+    def _get_adjacent_blocks(self,
+                             idx: Tuple[int, int, int],
+                             structure: Structure) -> Dict[Orientation, Optional[Block]]:
+        """Get the blocks adjacent to the index along each direction.
+
+        Args:
+            idx (Tuple[int, int, int]): The index (hull-scaled).
+            structure (Structure): The structure.
+
+        Returns:
+            Dict[Orientation, Optional[Block]]: The adjacent block (if any) along each direction.
+        """
+        return {direction: self._get_block_at(idx=idx,
+                                              offset=offset,
+                                              structure=structure) for direction, offset in zip(_orientations, _orientations_tuples)}
+    
     def _check_valid_position(self,
                               idx: Tuple[int, int, int],
                               block: Block,
                               hull: np.typing.NDArray,
-                              structure: Structure) -> Tuple[bool, int]:
+                              structure: Structure,
+                              neighbours: Optional[Dict[Orientation, Optional[Block]]] = None) -> Tuple[bool, int]:
         """Check if the current position is valid for the given block.
 
         Args:
             idx (Tuple[int, int, int]): The index of the block.
             block (Block): The block to check.
-            hull (npt.NDArray[np.float32]): The hull array.
+            hull (npt.NDArray[np.uint8]): The hull array.
             structure (Structure): The structure.
+            neighbours (Optional[Dict[Orientation, Optional[Block]]], optional): The blocks adjacent to the index along each direction. Defaults to None (looked up).
 
         Returns:
             Tuple[bool, int]: Whether the position is valid, and the area error.
         """
+        if neighbours is None:
+            neighbours = self._get_adjacent_blocks(idx=idx,
+                                                   structure=structure)
         valid = True
         area_err = 0
-        for direction in _orientations:
-            res, delta_area = self._check_valid_placement(idx=idx,
-                                                          block=block,
+        # faces without mountpoints are the only ones rejected without comparing mountpoints, so check them first
+        by_face = _get_mountpoints_by_face(block)
+        for direction in sorted(_orientations, key=lambda d: d in by_face):
+            res, delta_area = self._check_valid_placement(block=block,
                                                           direction=direction,
-                                                          structure=structure)
+                                                          other_block=neighbours[direction])
             valid &= res
             area_err += delta_area
             if not valid:
                 break
-        return valid, delta_area
+        return valid, area_err
     
     def try_smoothing(self,
                       idx: Tuple[int, int, int],
-                      hull: npt.NDArray[np.float32],
+                      hull: npt.NDArray[np.uint8],
                       structure: Structure) -> Optional[Block]:
         """Try applying a smoothing pass at the given index.
 
         Args:
             idx (Tuple[int, int, int]): The index.
-            hull (npt.NDArray[np.float32]): The hull array.
+            hull (npt.NDArray[np.uint8]): The hull array.
             structure (Structure): The structure.
 
         Returns:
@@ -582,12 +799,16 @@ class HullBuilder:
         """
         i, j, k = idx
         block_type = hull[i, j, k]
-        block = self._blocks_set[idx]
+        block = self._blocks_grid[idx]
+        # the neighbours do not change while checking the candidate blocks
+        neighbours = self._get_adjacent_blocks(idx=idx,
+                                               structure=structure)
         # removal check
         valid, curr_err = self._check_valid_position(idx=idx,
                                                      block=block,
                                                      hull=hull,
-                                                     structure=structure)
+                                                     structure=structure,
+                                                     neighbours=neighbours)
         if not valid:
             return None, BlockValue.AIR_BLOCK
         # replacement check   
@@ -595,27 +816,30 @@ class HullBuilder:
             # give priority to surrounding blocks orientations
             neighbourhood = self._get_neighbourhood(idx=idx,
                                                     structure=structure)
-            priority_scores = np.zeros(shape=len(_valid_orientations), dtype=np.int8).tolist()
-            for other_block in neighbourhood:                
-                oo = (orientation_from_vec(other_block.orientation_forward),
-                        orientation_from_vec(other_block.orientation_up))
-                priority_scores[_valid_orientations.index(oo)] = priority_scores[_valid_orientations.index(oo)] + (1 if other_block.block_type == block_type else 0)
-            idxs = [x for _, x in sorted(zip(priority_scores, np.arange(len(_valid_orientations)).tolist()))]
+            priority_scores = np.zeros(shape=len(_valid_orientations), dtype=np.int32)
+            for other_block in neighbourhood:
+                if other_block.block_type == block_type:
+                    oo = (orientation_from_vec(other_block.orientation_forward),
+                          orientation_from_vec(other_block.orientation_up))
+                    priority_scores[_valid_orientations_idxs[oo]] += 1
+            idxs = np.argsort(priority_scores, kind='stable')
             priority_orientations = [_valid_orientations[i] for i in idxs]
             for possible_type in _smoothing_order[block_type]:
-                orientation_scores, valids = np.zeros(shape=len(_valid_orientations), dtype=np.float32), np.zeros(shape=len(_valid_orientations), dtype=np.bool8)
+                # invalid orientations keep an infinite score, so they are never picked
+                orientation_scores = np.full(shape=len(_valid_orientations), fill_value=np.inf, dtype=np.float32)
                 # try replacement
                 for i, (of, ou) in enumerate(priority_orientations):
-                    possible_block = Block(block_type=block_value_types[possible_type],
-                                           orientation_forward=of,
-                                           orientation_up=ou)
+                    possible_block = _get_candidate_block(block_type=block_value_types[possible_type],
+                                                          orientation_forward=of,
+                                                          orientation_up=ou)
                     valid, err = self._check_valid_position(idx=idx,
                                                             block=possible_block,
                                                             hull=hull,
-                                                            structure=structure)
-                    orientation_scores[i] = err if valid else 9999  # make sure invalid scores are never picked
-                    valids[i] = valid
-                if any(valids) and min(orientation_scores) < curr_err:
+                                                            structure=structure,
+                                                            neighbours=neighbours)
+                    if valid:
+                        orientation_scores[i] = err
+                if orientation_scores.min() < curr_err:
                     of, ou = priority_orientations[np.argmin(orientation_scores)]
                     return Block(block_type=block_value_types[possible_type],
                                 orientation_forward=of,
@@ -633,42 +857,45 @@ class HullBuilder:
         Args:
             structure (Structure): The spaceship.
         """
-        self._blocks_set = {}
-        
         arr = structure.as_grid_array
         air = structure.air_blocks_gridmask
         hull = self._get_convex_hull(arr=arr)
-        hull[np.nonzero(air)] = BlockValue.AIR_BLOCK
-        hull[np.nonzero(arr)] = BlockValue.AIR_BLOCK
+        # no hull on internal air blocks and on the structure's blocks
+        np.putmask(hull, np.logical_or(air, arr), BlockValue.AIR_BLOCK)
         logging.getLogger('hullbuilder').debug(f'[{__name__}.add_external_hull] Added external hull.')
         
-        if self.apply_erosion:
+        # erode only within the bounding box of the hull, air blocks outside of it are not affected
+        bbox = _get_bounding_box(arr=hull, pad=1)
+        if self.apply_erosion and bbox is not None:
             if self.erosion_type == 'grey':
-                hull = grey_erosion(input=hull,
-                                    footprint=self.footprint,
-                                    mode='constant',
-                                    cval=1)
-                hull = hull.astype(int)
-                hull *= BlockValue.BASE_BLOCK                
+                eroded = grey_erosion(input=hull[bbox],
+                                      footprint=self.footprint,
+                                      mode='constant',
+                                      cval=1)
             elif self.erosion_type == 'bin':
-                dilated_arr = binary_dilation(arr)
-                mask = np.ones_like(arr) * BlockValue.BASE_BLOCK
-                mask[np.nonzero(dilated_arr)] = BlockValue.AIR_BLOCK                
-                hull = binary_erosion(input=hull,
-                                      mask=mask,
-                                      iterations=self.iterations)
-                hull = hull.astype(int)
-                hull *= BlockValue.BASE_BLOCK
+                # erosion cannot change blocks adjacent to the structure
+                ext_bbox = _get_bounding_box(arr=hull, pad=2)
+                inner = tuple(slice(s.start - e.start, s.stop - e.start) for s, e in zip(bbox, ext_bbox))
+                mask = ~_binary_dilation(arr[ext_bbox])[inner]
+                eroded = _binary_erosion(input=hull[bbox],
+                                         mask=mask,
+                                         iterations=self.iterations)
+            # the hull is already air outside of the bounding box, so it is updated in place
+            hull_view = hull[bbox]
+            hull_view.fill(BlockValue.AIR_BLOCK)
+            np.putmask(hull_view, eroded, BlockValue.BASE_BLOCK)
         logging.getLogger('hullbuilder').debug(f'[{__name__}.add_external_hull] Applied erosion.')
                 
-        # add blocks to self._blocks_set
-        for (i, j, k), _ in np.ndenumerate(hull):
-            if hull[i, j, k] != BlockValue.AIR_BLOCK:
-                self._add_block(block_type=self.base_block,
-                                idx=(i, j, k),
-                                pos=Vec.v3i(i, j, k).scale(v=structure.grid_size),
-                                orientation_forward=Orientation.FORWARD,
-                                orientation_up=Orientation.UP)
+        # add blocks to self._blocks_grid and self._blocks_mask
+        self._blocks_grid = np.empty(shape=hull.shape, dtype=object)
+        self._blocks_mask = np.zeros(shape=hull.shape, dtype=bool)
+        hull_idxs = np.argwhere(hull != BlockValue.AIR_BLOCK)
+        for (i, j, k), (x, y, z) in zip(hull_idxs.tolist(), (hull_idxs * structure.grid_size).tolist()):
+            self._add_block(block_type=self.base_block,
+                            idx=(i, j, k),
+                            pos=Vec(x=x, y=y, z=z),
+                            orientation_forward=Orientation.FORWARD,
+                            orientation_up=Orientation.UP)
         
         # remove all blocks that obstruct target block type
         hull = self._remove_obstructing_blocks(hull=hull,
@@ -682,62 +909,73 @@ class HullBuilder:
         logging.getLogger('hullbuilder').debug(f'[{__name__}.add_external_hull] Removed non-connected blocks.')
 
         # replace structure's blocks if adjacent to hull
-        for idx in self._blocks_set.keys():
-            for direction in _orientations:
-                new_idx = Vec.from_tuple(idx).sum(direction.value).scale(structure.grid_size).as_tuple()
-                if new_idx in structure._blocks.keys():
-                    curr_block = structure._blocks[new_idx]
-                    structure._blocks[new_idx] = Block(block_type=block_value_types[BlockValue.BASE_BLOCK],
-                                                       orientation_forward=orientation_from_vec(curr_block.orientation_forward),
-                                                       orientation_up=orientation_from_vec(curr_block.orientation_up))
+        scale = structure.grid_size
+        occupied = self._blocks_mask.astype(np.uint8)
+        adjacent = convolve(occupied, _neighbours_kernel, mode='constant', cval=0) > 0
+        # only positions occupied in the structure's grid array can hold a block to replace
+        for (i, j, k) in np.argwhere(adjacent & (arr != 0)).tolist():
+            new_idx = (scale * i, scale * j, scale * k)
+            if new_idx in structure._blocks:
+                curr_block = structure._blocks[new_idx]
+                structure._blocks[new_idx] = Block(block_type=block_value_types[BlockValue.BASE_BLOCK],
+                                                   orientation_forward=orientation_from_vec(curr_block.orientation_forward),
+                                                   orientation_up=orientation_from_vec(curr_block.orientation_up))
         logging.getLogger('hullbuilder').debug(f'[{__name__}.add_external_hull] Replaced existing adjacent structure blocks.')
         
         # apply iterative smoothing algorithm
         if self.apply_smoothing:
             logging.getLogger('hullbuilder').debug(f'[{__name__}.add_external_hull] Applying smoothing...')
-            my_arr = np.ones_like(hull) * BlockValue.AIR_BLOCK
-            my_arr[np.nonzero(structure.as_grid_array)] = BlockValue.BASE_BLOCK
-            my_arr[np.nonzero(hull)] = BlockValue.BASE_BLOCK
-            within_arr = binary_erosion(my_arr)
-            my_arr[np.where(within_arr == BlockValue.AIR_BLOCK)] = BlockValue.AIR_BLOCK
-            # idxs = self._get_outer_indices(arr=my_arr, edges_only=True)
-            idxs = self._get_outer_indices(arr=my_arr)
-            ii, jj, kk = idxs
-            curr_checking = [(i, j, k) for (i, j, k) in zip(ii, jj, kk)]
-            while len(curr_checking) != 0:
-                to_rem, to_inspect = [], []
-                for (i, j, k) in curr_checking:
-                    block = self._blocks_set[(i, j, k)]
-                    substitute_block, val = self.try_smoothing(idx=(i, j, k),
-                                                               hull=hull,
-                                                               structure=structure)
+            # idxs = self._get_outer_indices(edges_only=True)
+            idxs = self._get_outer_indices()
+            frontier = np.zeros(shape=hull.shape, dtype=bool)
+            frontier[idxs] = True
+            while frontier.any():
+                curr_checking = list(map(tuple, np.argwhere(frontier).tolist()))
+                changed = np.zeros(shape=hull.shape, dtype=np.uint8)
+                to_rem = []
+                if self.n_jobs == 1:
+                    # lazily evaluated, so each check sees the updates of the previous ones
+                    results = (self.try_smoothing(idx=idx, hull=hull, structure=structure) for idx in curr_checking)
+                else:
+                    results = Parallel(n_jobs=self.n_jobs, prefer="threads")(delayed(self.try_smoothing)(idx=idx, hull=hull, structure=structure) for idx in curr_checking)
+                for (i, j, k), (substitute_block, val) in zip(curr_checking, results):
+                    block = self._blocks_grid[i, j, k]
                     if substitute_block is not None and substitute_block.block_type != block.block_type:
                         substitute_block.position = block.position
-                        self._blocks_set[(i, j, k)] = substitute_block
-                        to_inspect.extend(self.adj_in_hull(idx=(i, j, k)))
+                        self._blocks_grid[i, j, k] = substitute_block
+                        changed[i, j, k] = 1
                         logging.getLogger('hullbuilder').debug(f'[{__name__}.add_external_hull] Updated {substitute_block}.')
                     elif substitute_block is None and val == BlockValue.AIR_BLOCK:
                         to_rem.append((i, j, k))
-                        to_inspect.extend(self.adj_in_hull(idx=(i, j, k)))
+                        changed[i, j, k] = 1
                     hull[i, j, k] = val
-                to_inspect = list(set(to_inspect))
-                to_rem = list(set(to_rem))
                 for r in to_rem:
-                    self._blocks_set.pop(r)
-                    if r in to_inspect:
-                        to_inspect.remove(r)
+                    self._remove_blocks(idxs=r)
                     logging.getLogger('hullbuilder').debug(f'[{__name__}.add_external_hull] Removed {r}.')
-                curr_checking = to_inspect
+                # the hull is stable once a wave changes no block
+                if not changed.any():
+                    break
+                # next, check the remaining blocks adjacent to the changed ones
+                frontier = (convolve(changed, _neighbours_kernel, mode='constant', cval=0) > 0) & self._blocks_mask
         logging.getLogger('hullbuilder').debug(f'[{__name__}.add_external_hull] Smoothing applied.')
 
         # add blocks to structure
-        for k, block in self._blocks_set.items():
+        for idx in self._get_hull_indices():
+            block = self._blocks_grid[idx]
             structure.add_block(block=block,
                                 grid_position=block.position.as_tuple())
         
         structure.sanify()
 
 
+_symmetry_rotations = {
+    'x': ['RotYcwX', 'RotYccwX'],
+    'z': ['RotYcwZ', 'RotYccwZ']
+}
+# rotations at the start of a bracket
+_symmetry_rotation_re = re.compile(r'\[(RotY(?:cw|ccw)[XZ])')
+
+
 def enforce_symmetry(string: str,
                      axis: str = 'z') -> str:
     """Enforce a symmetry along an axis.
@@ -756,29 +994,31 @@ def enforce_symmetry(string: str,
     symm_points, to_remove = [], []
     logging.getLogger('hullbuilder').debug(f'[{__name__}.enforce_symmetry] {string=}; {brackets=}')
     
-    if axis == 'x':
-        rotations = ['RotYcwX', 'RotYccwX']
-    elif axis == 'z':
-        rotations = ['RotYcwZ', 'RotYccwZ']
-    else:
+    if axis not in _symmetry_rotations:
         raise ValueError(f'Invalid rotation axis: {axis}.')
+    rotations = _symmetry_rotations[axis]
     
+    rotations_at = {m.start(): m.group(1) for m in _symmetry_rotation_re.finditer(string) if m.group(1) in rotations}
     for b0, b1 in brackets:
-        for rotation in rotations:
-            if string[b0 + 1:b0 + 1 + len(rotation)].startswith(rotation) or string[b0 + 1:b0 + 1 + len(rotation)].startswith(rotation):
-                symm_points.append(((b0, b1), rotation))
+        if b0 in rotations_at:
+            symm_points.append(((b0, b1), rotations_at[b0]))
     logging.getLogger('hullbuilder').debug(f'[{__name__}.enforce_symmetry] (pre) {symm_points=}')
     
+    # brackets are sorted by their opening position and are either nested or disjoint,
+    # so the brackets contained in a bracket immediately follow it in symm_points
+    starts = [b0 for (b0, _), _ in symm_points]
+    by_start = {b0: i for i, b0 in enumerate(starts)}
+    removed = set()
     for i, ((b00, b01), rotation0) in enumerate(symm_points):
-        for j, ((b10, b11), rotation1) in enumerate(symm_points[i:]):
-            if j + i not in to_remove:
-                logging.getLogger('hullbuilder').debug(f'[{__name__}.enforce_symmetry] {((b00, b01), rotation0)}-{((b10, b11), rotation1)}; {b10 == b01 + 1=}; {rotation0 == __inverse(rotation1)=}; {b00 < b10 < b11 < b01=}')
-                if b10 == b01 + 1 and rotation0 == __inverse(rotation1):
-                    to_remove.append(i)
-                    to_remove.append(j + i)
-                    break
-                if b00 < b10 < b11 < b01:
-                    to_remove.append(j + i)
+        for j in range(i + 1, bisect_left(starts, b01, lo=i + 1)):
+            if j not in removed and symm_points[j][0][1] < b01:
+                to_remove.append(j)
+                removed.add(j)
+        j = by_start.get(b01 + 1, None)
+        if j is not None and j not in removed and rotation0 == __inverse(symm_points[j][1]):
+            logging.getLogger('hullbuilder').debug(f'[{__name__}.enforce_symmetry] {((b00, b01), rotation0)}-{symm_points[j]} are inverse')
+            to_remove.extend([i, j])
+            removed.update([i, j])
     logging.getLogger('hullbuilder').debug(f'[{__name__}.enforce_symmetry] {to_remove=}')
     
     for i in reversed(sorted(to_remove)):
@@ -22,10 +22,7 @@ def intersection_constraint(cs: CandidateSolution,
 def symmetry_constraint(cs: CandidateSolution,
                         extra_args: Dict[str, Any]) -> bool:
     structure = cs.content.as_array
-    is_symmetric = False
-    for dim in range(3):
-        is_symmetric |= np.array_equal(structure, np.flip(structure, axis=dim))
-    return is_symmetric
+    return any(np.array_equal(structure, np.flip(structure, axis=dim)) for dim in range(3))
 
 
 def axis_constraint(cs: CandidateSolution,
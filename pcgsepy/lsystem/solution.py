@@ -8,10 +8,22 @@ from pcgsepy.common.vecs import Vec
 from ..structure import Structure
 
 
+_unique_blocks_dict = {
+    'Gyroscopes': ['MyObjectBuilder_Gyro_LargeBlockGyro'],
+    'Reactors': ['MyObjectBuilder_Reactor_LargeBlockSmallGenerator'],
+    'Containers': ['MyObjectBuilder_CargoContainer_LargeBlockSmallContainer'],
+    'Cockpits': ['MyObjectBuilder_Cockpit_OpenCockpitLarge'],
+    'Thrusters': ['MyObjectBuilder_Thrust_LargeBlockSmallThrust'],
+    'Lights': ['MyObjectBuilder_InteriorLight_SmallLight', 'MyObjectBuilder_InteriorLight_LargeBlockLight_1corner']
+}
+_unique_blocks_categories = {v: k for k, vs in _unique_blocks_dict.items() for v in vs}
+
+
 class CandidateSolution:
     __slots__ = ['string', '_content', 'age', 'b_descs', 'c_fitness', 'fitness', 'hls_mod',
                  'is_feasible', 'll_string', 'n_feas_offspring', 'n_offspring', 'ncv',
-                 'parents', 'representation', 'base_color', 'n_blocks', 'content_size']
+                 'parents', 'representation', 'base_color', 'n_blocks', 'content_size',
+                 '_unique_blocks_cache']
     
     def __init__(self,
                  string: str,
@@ -34,6 +46,7 @@ class CandidateSolution:
         self.base_color = Vec.v3f(x=0.45, y=0.45, z=0.45)  # default block color is #737373
         self.n_blocks = 0
         self.content_size = (0, 0, 0)
+        self._unique_blocks_cache = None
 
     def __str__(self) -> str:
         return f'{self.string}; fitness: {self.c_fitness}; is_feasible: {self.is_feasible}'
@@ -43,8 +56,11 @@ class CandidateSolution:
 
     def __eq__(self,
                other: 'CandidateSolution') -> bool:
+        if self is other:
+            return True
         if isinstance(other, CandidateSolution):
-            return self.string == other.string
+            # str objects cache their hash, so mismatching strings are usually told apart without a full comparison
+            return hash(self.string) == hash(other.string) and self.string == other.string
         return False
 
     def __hash__(self):
@@ -65,6 +81,11 @@ class CandidateSolution:
         else:
             self._content = content
             self.n_blocks = len(content._blocks)
+            self.invalidate_unique_blocks()
+
+    def invalidate_unique_blocks(self) -> None:
+        """Discard the cached blocks counts. Must be called whenever the content is replaced or its blocks are changed (eg: a hull is added)."""
+        self._unique_blocks_cache = None
 
     @property
     def content(self) -> Structure:
@@ -79,22 +100,19 @@ class CandidateSolution:
     
     @property
     def unique_blocks(self) -> Dict[str, int]:
-        unique_blocks_dict = {
-            'Gyroscopes': ['MyObjectBuilder_Gyro_LargeBlockGyro'],
-            'Reactors': ['MyObjectBuilder_Reactor_LargeBlockSmallGenerator'],
-            'Containers': ['MyObjectBuilder_CargoContainer_LargeBlockSmallContainer'],
-            'Cockpits': ['MyObjectBuilder_Cockpit_OpenCockpitLarge'],
-            'Thrusters': ['MyObjectBuilder_Thrust_LargeBlockSmallThrust'],
-            'Lights': ['MyObjectBuilder_InteriorLight_SmallLight', 'MyObjectBuilder_InteriorLight_LargeBlockLight_1corner']
-        }
-        counts = {}
-        for k, vs in unique_blocks_dict.items():
-            counts[k] = 0
-            for v in vs:
-                counts[k] = counts[k] + self._content.unique_blocks_count(block_type=v)
-        return counts
+        # the counts are recomputed only after the cache has been invalidated
+        # (solutions pickled before the cache was added do not have it set)
+        if getattr(self, '_unique_blocks_cache', None) is None:
+            counts = {k: 0 for k in _unique_blocks_dict.keys()}
+            for block in self._content._blocks.values():
+                k = _unique_blocks_categories.get(block.block_type, None)
+                if k is not None:
+                    counts[k] += 1
+            self._unique_blocks_cache = counts
+        return dict(self._unique_blocks_cache)
     
-    def to_json(self) -> Dict[str, Any]:
+    def _to_json_node(self,
+                      parents: List[Any]) -> Dict[str, Any]:
         return {
             'string': self.string,
             'age': self.age,
@@ -107,12 +125,27 @@ class CandidateSolution:
             'n_feas_offspring': self.n_feas_offspring,
             'n_offspring': self.n_offspring,
             'ncv': self.ncv,
-            'parents': [p.to_json() for p in self.parents],
+            'parents': parents,
             'representation': self.representation
         }
     
+    def to_json(self) -> Dict[str, Any]:
+        # each ancestor is serialized once in the lineage and referenced by its index (the solution itself is 0)
+        nodes = [self]
+        nodes_idxs = {id(self): 0}
+        # nodes grows while iterating, so ancestors are visited breadth-first
+        for cs in nodes:
+            for parent in cs.parents:
+                if id(parent) not in nodes_idxs:
+                    nodes_idxs[id(parent)] = len(nodes)
+                    nodes.append(parent)
+        lineage = [cs._to_json_node(parents=[nodes_idxs[id(parent)] for parent in cs.parents]) for cs in nodes]
+        j = lineage[0]
+        j['lineage'] = lineage[1:]
+        return j
+    
     @staticmethod
-    def from_json(my_args: Dict[str, Any]) -> 'CandidateSolution':
+    def _from_json_node(my_args: Dict[str, Any]) -> 'CandidateSolution':
         cs = CandidateSolution(string=my_args['string'],
                                content=None)
         cs.age = my_args['age']
@@ -125,9 +158,25 @@ class CandidateSolution:
         cs.n_feas_offspring = my_args['n_feas_offspring']
         cs.n_offspring = my_args['n_offspring']
         cs.ncv = my_args['ncv']
-        cs.parents = [CandidateSolution.from_json(args=p) for p in my_args['parents']]
         cs.representation = my_args['representation']
         return cs
+    
+    @staticmethod
+    def from_json(my_args: Dict[str, Any]) -> 'CandidateSolution':
+        if 'lineage' in my_args:
+            entries = [my_args, *my_args['lineage']]
+            nodes = [CandidateSolution._from_json_node(my_args=entry) for entry in entries]
+            for cs, entry in zip(nodes, entries):
+                cs.parents = [nodes[i] for i in entry['parents']]
+            return nodes[0]
+        # parents nested in each solution, as saved by earlier versions
+        root = CandidateSolution._from_json_node(my_args=my_args)
+        to_visit = [(root, my_args)]
+        while to_visit:
+            cs, entry = to_visit.pop()
+            cs.parents = [CandidateSolution._from_json_node(my_args=p) for p in entry['parents']]
+            to_visit.extend(zip(cs.parents, entry['parents']))
+        return root
 
 
 def string_merging(ls: List[str]) -> str:
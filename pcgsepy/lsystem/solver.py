@@ -19,6 +19,7 @@ class LSolver:
         self.parser = parser
         self.atoms_alphabet = atoms_alphabet
         self.constraints = []
+        self._constraints_by_time = {}
         self.inner_loops_during = 5
         self.inner_loops_end = 5
         self.translator = None
@@ -36,7 +37,7 @@ class LSolver:
         logging.getLogger('solver').debug(f'[{__name__}._forward_expansion] Expanding {cs.string=}.')
         for i in range(n):
             cs.string = self.parser.expand(string=cs.string)
-        if dc_check and len([c for c in self.constraints if c.when == ConstraintTime.DURING]) > 0:
+        if dc_check and self._constraints_by_time.get(ConstraintTime.DURING):
             if not self._check_constraints(cs=cs,
                                            when=ConstraintTime.DURING)[ConstraintLevel.HARD_CONSTRAINT][0]:
                 cs = None  # do not continue expansion if it breaks hard constraints during expansion
@@ -51,17 +52,16 @@ class LSolver:
             ConstraintLevel.SOFT_CONSTRAINT: [True, 0],
             ConstraintLevel.HARD_CONSTRAINT: [True, 0],
         }
-        for lev in sat.keys():
-            for c in self.constraints:
-                if c.when == when and c.level == lev:
-                    s = c.constraint(cs=cs,
-                                     extra_args=c.extra_args)
-                    logging.getLogger('solver').debug(f'[{__name__}._forward_expansion] \t{c}:\t{s}.')
-                    sat[lev][0] &= s
-                    if keep_track:
-                        sat[lev][1] += (
-                            1 if lev == ConstraintLevel.HARD_CONSTRAINT else
-                            0.5) if not s else 0
+        for lev, lev_cs in self._constraints_by_time.get(when, {}).items():
+            for c in lev_cs:
+                s = c.constraint(cs=cs,
+                                 extra_args=c.extra_args)
+                logging.getLogger('solver').debug(f'[{__name__}._forward_expansion] \t{c}:\t{s}.')
+                sat[lev][0] &= s
+                if keep_track:
+                    sat[lev][1] += (
+                        1 if lev == ConstraintLevel.HARD_CONSTRAINT else
+                        0.5) if not s else 0
         return sat
 
     def solve(self,
@@ -86,7 +86,7 @@ class LSolver:
             all_solutions = list(set(all_solutions))  # remove duplicates
 
         # END constraints check + possible backtracking
-        if check_sat and len([c for c in self.constraints if c.when == ConstraintTime.END]) > 0:
+        if check_sat and self._constraints_by_time.get(ConstraintTime.END):
             to_keep = np.zeros(shape=len(all_solutions), dtype=np.bool8)
             for i, cs in enumerate(all_solutions):
                 logging.getLogger('solver').debug(f'[{__name__}.solve] Finalizing string {cs.string}')
@@ -100,6 +100,11 @@ class LSolver:
     def set_constraints(self,
                         cs: List[ConstraintHandler]) -> None:
         self.constraints = cs
+        # group constraints by time and level once, instead of filtering them at every check
+        self._constraints_by_time = {}
+        for when in ConstraintTime:
+            by_level = {lev: [c for c in cs if c.when == when and c.level == lev] for lev in ConstraintLevel}
+            self._constraints_by_time[when] = {lev: lev_cs for lev, lev_cs in by_level.items() if lev_cs}
     
     def to_json(self) -> Dict[str, Any]:
         j = {
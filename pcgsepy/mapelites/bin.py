@@ -3,7 +3,7 @@ from tabnanny import check
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
-from pcgsepy.config import BIN_POP_SIZE, BIN_SMALLEST_PERC
+from pcgsepy.config import BIN_POP_SIZE, BIN_SMALLEST_PERC, CS_MAX_AGE
 from pcgsepy.lsystem.solution import CandidateSolution
 
 
@@ -64,6 +64,20 @@ class MAPBin:
         """
         return len(self._feasible if pop == 'feasible' else self._infeasible) > 0
 
+    def has_new(self,
+                pop: Optional[str] = None) -> bool:
+        """Check if the bin contains a solution added in the current generation (with age `CS_MAX_AGE`).
+
+        Args:
+            pop (Optional[str], optional): The population to check for. If `None`, both populations are checked. Defaults to `None`.
+
+        Returns:
+            bool: Whether the bin contains a new solution.
+        """
+        if pop is None:
+            return self.has_new(pop='feasible') or self.has_new(pop='infeasible')
+        return any(cs.age == CS_MAX_AGE for cs in (self._feasible if pop == 'feasible' else self._infeasible))
+
     def _reduce_pop(self,
                     pop: List[CandidateSolution]) -> List[CandidateSolution]:
         """Cull the population within this bin.
@@ -111,6 +125,7 @@ class MAPBin:
             for cs in self._feasible if pop == 'feasible' else self._infeasible:
                 if cs.string != elite.string:
                     cs._content = None
+                    cs.invalidate_unique_blocks()
     
     def age(self,
             diff: int = -1):
@@ -175,7 +190,7 @@ class MAPBin:
         pop = self._feasible if population == 'feasible' else self._infeasible
         if pop:
             get_max = always_max or population == 'feasible'
-            return sorted(pop, key=lambda x: x.c_fitness, reverse=get_max)[0]
+            return (max if get_max else min)(pop, key=lambda x: x.c_fitness)
         else:
             return None
 
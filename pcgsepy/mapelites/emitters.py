@@ -5,7 +5,7 @@ import logging
 import numpy as np
 import numpy.typing as npt
 from sklearn.neural_network import MLPRegressor
-from pcgsepy.config import BETA_A, BETA_B, CONTEXT_IDXS, CS_MAX_AGE, N_EPOCHS, USE_TORCH
+from pcgsepy.config import BETA_A, BETA_B, CONTEXT_IDXS, N_EPOCHS, USE_TORCH
 from pcgsepy.mapelites.bin import MAPBin
 from pcgsepy.mapelites.buffer import Buffer, mean_merge
 from scipy.special import softmax
@@ -30,6 +30,20 @@ else:
             raise NotImplementedError('This function should never be called')
 
 
+def _get_valid_idxs(bins: 'np.ndarray[MAPBin]') -> List[Tuple[int, int]]:
+    """Get the indices of the bins with both feasible and infeasible solutions, in row-major order.
+
+    Args:
+        bins (np.ndarray[MAPBin]): The MAP-Elites bins.
+
+    Returns:
+        List[Tuple[int, int]]: The indices of the valid bins.
+    """
+    sizes = np.fromiter((min(len(b._feasible), len(b._infeasible)) for b in bins.flat),
+                        dtype=np.int64, count=bins.size).reshape(bins.shape)
+    return [tuple(idx) for idx in np.argwhere(sizes > 0).tolist()]
+
+
 class Emitter(ABC):
     def __init__(self) -> None:
         super().__init__()
@@ -77,7 +91,7 @@ class RandomEmitter(Emitter):
         Returns:
             MAPBin: The randomly picked bin.
         """
-        bins = [b for b in bins.flatten().tolist() if b.non_empty(pop='feasible') or b.non_empty(pop='infeasible')]
+        bins = [b for b in bins.flat if b.non_empty(pop='feasible') or b.non_empty(pop='infeasible')]
         fcs, ics = 0, 0
         selected = []
         while fcs < 2 or ics < 2:
@@ -125,7 +139,7 @@ class OptimisingEmitter(Emitter):
         Returns:
             MAPBin: The selected bin.
         """
-        bins = [b for b in bins.flatten().tolist() if b.non_empty(pop='feasible') or b.non_empty(pop='infeasible')]
+        bins = [b for b in bins.flat if b.non_empty(pop='feasible') or b.non_empty(pop='infeasible')]
         sorted_bins = sorted(bins, key=lambda x: x.get_metric(metric='fitness', use_mean=True, population='feasible'), reverse=True)
         fcs, ics = 0, 0
         selected = []
@@ -174,7 +188,7 @@ class OptimisingEmitterV2(Emitter):
         Returns:
             MAPBin: The selected bin.
         """
-        bins = [b for b in bins.flatten().tolist() if b.non_empty(pop='feasible') or b.non_empty(pop='infeasible')]
+        bins = [b for b in bins.flat if b.non_empty(pop='feasible') or b.non_empty(pop='infeasible')]
         sorted_bins_f = sorted(bins, key=lambda x: x.get_metric(metric='fitness', use_mean=True, population='feasible'), reverse=True)
         sorted_bins_i = sorted(bins, key=lambda x: x.get_metric(metric='fitness', use_mean=True, population='infeasible'), reverse=True)
         fcs, ics = 0, 0
@@ -314,14 +328,7 @@ class HumanPrefMatrixEmitter(Emitter):
         
     def _get_n_new_bins(self,
                         bins: 'np.ndarray[MAPBin]') -> int:
-        n_new_bins = 0
-        for (_, _), b in np.ndenumerate(bins):
-            css = [*b._feasible, *b._infeasible]
-            for cs in css:
-                if cs.age == CS_MAX_AGE:
-                    n_new_bins += 1
-                    break
-        return n_new_bins
+        return sum(1 for b in bins.flat if b.has_new())
     
     def _reshape_matrix(self,
                         arr: np.typing.NDArray,
@@ -355,7 +362,7 @@ class HumanPrefMatrixEmitter(Emitter):
         assert self._prefs is not None, 'Human-preference emitter has not been initialized! Preference matrix has not been set.'
         self._last_selected = []
         selected_bins = []
-        non_empty = set([(i, j) for (i, j), b in np.ndenumerate(bins) if b.non_empty('feasible') and b.non_empty('infeasible')])
+        non_empty = set(_get_valid_idxs(bins=bins))
         valid_prefs = set([tuple(x) for x in np.argwhere(self._prefs > 0).tolist()])
         valid_idxs = list(non_empty.intersection(valid_prefs))
         if self.sampling_strategy == 'epsilon-greedy':
@@ -405,14 +412,10 @@ class HumanPrefMatrixEmitter(Emitter):
             self._prefs[i, j] += 1.
             # if selected bin was just created, update parent bin accordingly
             if self._last_selected is not None:
-                b = bins[i, j]
-                css = [*b._feasible, *b._infeasible]
-                for cs in css:
-                    if cs.age == CS_MAX_AGE:
-                        # we don't know which bin generated which, so update them all proportionally
-                        for mn in self._last_selected:
-                            self._prefs[mn[0], mn[1]] += 1 / n_new_bins
-                        break
+                if bins[i, j].has_new():
+                    # we don't know which bin generated which, so update them all proportionally
+                    for mn in self._last_selected:
+                        self._prefs[mn[0], mn[1]] += 1 / n_new_bins
     
     def post_step(self,
                   bins: 'np.ndarray[MAPBin]') -> None:
@@ -551,7 +554,7 @@ class ContextualBanditEmitter(Emitter):
                  bins: 'np.ndarray[MAPBin]') -> List[MAPBin]:
         assert self._fitted, f'{self.name} requires fitting and has not been fit yet!'
         selected_bins = []
-        valid_idxs = [(i, j) for (i, j), b in np.ndenumerate(bins) if b.non_empty('feasible') and b.non_empty('infeasible')]
+        valid_idxs = _get_valid_idxs(bins=bins)
         valid_bins = [bins[x] for x in valid_idxs]
         predicted_prefs = self._predict(bins=valid_bins)
         if self.sampling_strategy == 'epsilon-greedy':
@@ -764,7 +767,7 @@ class PreferenceBanditEmitter(Emitter):
                  bins: 'np.ndarray[MAPBin]') -> List[MAPBin]:
         assert self._fitted, f'{self.name} requires fitting and has not been fit yet!'
         selected_bins = []
-        valid_idxs = [(i, j) for (i, j), b in np.ndenumerate(bins) if b.non_empty('feasible') and b.non_empty('infeasible')]
+        valid_idxs = _get_valid_idxs(bins=bins)
         valid_bins = [bins[x] for x in valid_idxs]        
         predicted_prefs = self._predict(bins=valid_bins)
         if self.sampling_strategy == 'epsilon-greedy':
@@ -954,7 +957,7 @@ class KNEmitter(Emitter):
                  bins: 'np.ndarray[MAPBin]') -> List[MAPBin]:
         assert self._fitted, f'{self.name} requires fitting and has not been fit yet!'
         selected_bins = []
-        valid_idxs = [(i, j) for (i, j), b in np.ndenumerate(bins) if b.non_empty('feasible') and b.non_empty('infeasible')]
+        valid_idxs = _get_valid_idxs(bins=bins)
         valid_bins: List[MAPBin] = [bins[x] for x in valid_idxs]        
         predicted_prefs = self._predict(bins=valid_bins)
         if self.sampling_strategy == 'epsilon-greedy':
@@ -1105,7 +1108,7 @@ class KernelEmitter(Emitter):
                  bins: 'np.ndarray[MAPBin]') -> List[MAPBin]:
         assert self._fitted, f'{self.name} requires fitting and has not been fit yet!'
         selected_bins = []
-        valid_idxs = [(i, j) for (i, j), b in np.ndenumerate(bins) if b.non_empty('feasible') and b.non_empty('infeasible')]
+        valid_idxs = _get_valid_idxs(bins=bins)
         valid_bins = [bins[x] for x in valid_idxs]        
         predicted_prefs = self._predict(bins=valid_bins)
         if self.sampling_strategy == 'epsilon-greedy':
@@ -1282,7 +1285,7 @@ class SimpleTabularEmitter(Emitter):
                  bins: 'np.ndarray[MAPBin]') -> List[MAPBin]:
         assert self._fitted, f'{self.name} requires fitting and has not been fit yet!'
         selected_bins = []
-        valid_idxs = [(i, j) for (i, j), b in np.ndenumerate(bins) if b.non_empty('feasible') and b.non_empty('infeasible')]
+        valid_idxs = _get_valid_idxs(bins=bins)
         valid_bins = [bins[x] for x in valid_idxs]        
         predicted_prefs = self._predict(idxs=valid_idxs)
         if self.sampling_strategy == 'epsilon-greedy':
@@ -1,5 +1,9 @@
 from http.client import GATEWAY_TIMEOUT
+import itertools
+import os
+import pickle
 import random
+import threading
 import time
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
@@ -29,6 +33,7 @@ from pcgsepy.mapelites.emitters import (Emitter, HumanPrefMatrixEmitter,
                                         RandomEmitter, emitters,
                                         get_emitter_by_str)
 from pcgsepy.nn.estimators import (GaussianEstimator, prepare_dataset)
+from pcgsepy.structure import Structure
 from tqdm import trange
 from typing_extensions import Self
 
@@ -48,6 +53,83 @@ else:
         raise NotImplementedError('This function should never be called')    
 
 
+# fitnesses used as representation of infeasible solutions
+_infeasible_representation_fitnesses = (Fitness(name='BoxFilling', f=box_filling_fitness, bounds=(0, 1)),
+                                        Fitness(name='FuncionalBlocks', f=func_blocks_fitness, bounds=(0, 1)),
+                                        Fitness(name='MajorMediumProportions', f=mame_fitness, bounds=(0, 1)),
+                                        Fitness(name='MajorMinimumProportions', f=mami_fitness, bounds=(0, 1)))
+
+# minimum number of solutions for hulls to be built in separate processes (smaller pools do not make up for starting the workers)
+_min_process_pool_size = 4
+
+# per-thread hull builders, reused across solutions
+_hull_builders = threading.local()
+
+
+def _get_hull_builder(erosion_type: str,
+                      apply_erosion: bool,
+                      apply_smoothing: bool,
+                      n_jobs: int) -> HullBuilder:
+    """Get the hull builder of the current thread, creating it if missing or configured differently.
+    The hull builder resets its grids on each `add_external_hull` call, so it can be reused within a thread.
+
+    Args:
+        erosion_type (str): The erosion type of the hull builder.
+        apply_erosion (bool): Whether the hull builder applies erosion.
+        apply_smoothing (bool): Whether the hull builder applies smoothing.
+        n_jobs (int): The number of jobs of the hull builder.
+
+    Returns:
+        HullBuilder: The hull builder of the current thread.
+    """
+    signature = (erosion_type, apply_erosion, apply_smoothing, n_jobs)
+    if getattr(_hull_builders, 'signature', None) != signature:
+        _hull_builders.hb = HullBuilder(erosion_type=erosion_type,
+                                        apply_erosion=apply_erosion,
+                                        apply_smoothing=apply_smoothing,
+                                        n_jobs=n_jobs)
+        _hull_builders.signature = signature
+    return _hull_builders.hb
+
+
+def _build_hull(structure: Structure,
+                erosion_type: str,
+                apply_erosion: bool,
+                apply_smoothing: bool,
+                n_jobs: int) -> Structure:
+    """Add the external hull to a structure. Used to build hulls in worker processes.
+
+    Args:
+        structure (Structure): The structure.
+        erosion_type (str): The erosion type of the hull builder.
+        apply_erosion (bool): Whether the hull builder applies erosion.
+        apply_smoothing (bool): Whether the hull builder applies smoothing.
+        n_jobs (int): The number of jobs of the hull builder.
+
+    Returns:
+        Structure: The structure with the hull.
+    """
+    _get_hull_builder(erosion_type=erosion_type,
+                      apply_erosion=apply_erosion,
+                      apply_smoothing=apply_smoothing,
+                      n_jobs=n_jobs).add_external_hull(structure=structure)
+    return structure
+
+
+def _feasible_ages_and_fitnesses(mapelites: 'MAPElites') -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.float64]]:
+    """Collect the age and fitness of all feasible solutions in a single sweep over the bins.
+
+    Args:
+        mapelites (MAPElites): The MAP-Elites object.
+
+    Returns:
+        Tuple[npt.NDArray[np.int64], npt.NDArray[np.float64]]: The ages and the fitnesses.
+    """
+    solutions = [(cs.age, cs.c_fitness) for map_bin in mapelites.bins.flat for cs in map_bin._feasible]
+    ages, fitnesses = zip(*solutions) if solutions else ((), ())
+    return np.asarray(ages, dtype=np.int64), np.asarray(fitnesses, dtype=np.float64)
+
+
 def coverage_reward(mapelites: 'MAPElites') -> float:
     """Compute the coverage reward. Coverage reward is a percentage of new bins over total possible number of bins.
 
@@ -57,9 +139,8 @@ def coverage_reward(mapelites: 'MAPElites') -> float:
     Returns:
         float: The coverage reward.
     """
-    tot_coverage = mapelites.bins.shape[0] * mapelites.bins.shape[1]
-    inc_coverage = sum([1 if any([cs.age == CS_MAX_AGE for cs in map_bin._feasible]) else 0 for map_bin in mapelites.bins.flatten().tolist()])
-    return inc_coverage / tot_coverage
+    inc_coverage = sum(1 for cbin in mapelites.bins.flat if cbin.has_new(pop='feasible'))
+    return inc_coverage / mapelites.bins.size
 
 
 def fitness_reward(mapelites: 'MAPElites') -> float:
@@ -69,17 +150,13 @@ def fitness_reward(mapelites: 'MAPElites') -> float:
         mapelites (MAPElites): The MAP-Elites object.
 
     Returns:
-        float: The fitness reward.
+        float: The fitness reward (`0.` if there is no past solution to compare against).
     """
-    prev_best, current_best = 0, 0
-    for map_bin in mapelites.bins.flatten().tolist():
-        for cs in map_bin._feasible:
-            if cs.age == CS_MAX_AGE and cs.c_fitness > prev_best:
-                current_best = cs.c_fitness
-            elif cs.age != CS_MAX_AGE and cs.c_fitness > prev_best:
-                prev_best = cs.c_fitness
-    fit_diff = current_best - prev_best
-    return fit_diff / prev_best
+    ages, fitnesses = _feasible_ages_and_fitnesses(mapelites=mapelites)
+    is_new = ages == CS_MAX_AGE
+    current_best = fitnesses[is_new].max(initial=0.)
+    prev_best = fitnesses[~is_new].max(initial=0.)
+    return float((current_best - prev_best) / prev_best) if prev_best else 0.
 
 
 agent_rewards = {
@@ -138,6 +215,7 @@ class MAPElites:
         self._initial_n_bins = n_bins
         self.bin_qnt = n_bins
         self.bin_sizes = [[self.limits[0] / self.bin_qnt[0]] * n_bins[0], [self.limits[1] / self.bin_qnt[1]] * n_bins[1]]
+        self._update_bins_edges()
         self.bins: npt.NDarray[MAPBin] = np.empty(shape=self.bin_qnt, dtype=MAPBin)
         for (i, j), _ in np.ndenumerate(self.bins):
             self.bins[i, j] = MAPBin(bin_idx=(i, j),
@@ -152,6 +230,7 @@ class MAPElites:
         self.max_f_fitness = sum([f.bounds[1] for f in self.feasible_fitnesses])
         self.max_i_fitness = len(self.lsystem.all_hl_constraints) if not self.estimator else 1
         self.infeas_fitness_idx = 1  # 0: min, 1: median, 2: max
+        self._applied_infeas_fitness_idx = None  # merge method last applied to the existing infeasible solutions
         # MAP-Elites properties
         self.allow_res_increase = True
         self.allow_aging = True
@@ -173,11 +252,9 @@ class MAPElites:
             population (str, optional): Which population to show metric of. Defaults to `'feasible'`.
             save_as (str, optional): Where to save the metric plot. Defaults to `None`.
         """
-        disp_map = np.zeros(shape=self.bins.shape)
-        for (i, j), cbin in np.ndenumerate(self.bins):
-            disp_map[i, j] = cbin.get_metric(metric=metric,
-                                             use_mean=show_mean,
-                                             population=population)
+        disp_map = self._bins_metric(metric=metric,
+                                     use_mean=show_mean,
+                                     population=population)
         vmaxs = {
             'fitness': {
                 'feasible': self.max_f_fitness,
@@ -227,15 +304,11 @@ class MAPElites:
         """
         if cs.is_feasible:
             cs.fitness = [f(cs) for f in self.feasible_fitnesses]
-            cs.representation = cs.fitness[:]
             x, y, z = cs.content._max_dims
-            cs.representation.extend([x / MAX_X_SIZE, y / MAX_Y_SIZE, z / MAX_Z_SIZE])
+            cs.representation = [*cs.fitness, x / MAX_X_SIZE, y / MAX_Y_SIZE, z / MAX_Z_SIZE]
             return sum([self.feasible_fitnesses[i].weight * cs.fitness[i] for i in range(len(cs.fitness))])
         else:
-            cs.representation = [f(cs) for f in [Fitness(name='BoxFilling', f=box_filling_fitness, bounds=(0, 1)),
-                                                 Fitness(name='FuncionalBlocks', f=func_blocks_fitness, bounds=(0, 1)),
-                                                 Fitness(name='MajorMediumProportions', f=mame_fitness, bounds=(0, 1)),
-                                                 Fitness(name='MajorMinimumProportions', f=mami_fitness, bounds=(0, 1))]]
+            cs.representation = [f(cs) for f in _infeasible_representation_fitnesses]
             if self.estimator is not None:
                 if isinstance(self.estimator, GaussianEstimator):
                     return self.estimator.predict(x=np.asarray(cs.representation)) if self.estimator.is_trained else EPSILON_F
@@ -255,6 +328,34 @@ class MAPElites:
             else:
                 return cs.ncv
 
+    def _predict_infeasible_fitnesses(self,
+                                      lcs: List[CandidateSolution]) -> None:
+        """Set the fitness of infeasible solutions from the trained estimator, predicting all of them at once.
+        The solutions must already have their representation set.
+
+        Args:
+            lcs (List[CandidateSolution]): The infeasible solutions.
+
+        Raises:
+            NotImplementedError: Raised if the estimator is not recognized.
+        """
+        if not lcs:
+            return
+        xs = np.asarray([cs.representation for cs in lcs])
+        if isinstance(self.estimator, GaussianEstimator):
+            for cs, f in zip(lcs, self.estimator.predict_batch(xs=xs).tolist()):
+                cs.c_fitness = f
+        elif USE_TORCH and isinstance(self.estimator, MLPEstimator):
+            for cs, f in zip(lcs, self.estimator.predict_batch(xs=xs).tolist()):
+                cs.c_fitness = f
+        elif USE_TORCH and isinstance(self.estimator, QuantileEstimator):
+            for cs, fs in zip(lcs, self.estimator.predict_batch(xs=xs)):
+                # fitness is (3,) array (min, median, max)
+                cs.fitness = fs
+                cs.c_fitness = cs.fitness[self.infeas_fitness_idx]
+        else:
+            raise NotImplementedError(f'Unrecognized estimator type: {type(self.estimator)}.')
+
     def _assign_fitness(self,
                         cs: CandidateSolution) -> CandidateSolution:
         """Assign the fitness and BCs to a candidate solution.
@@ -287,10 +388,12 @@ class MAPElites:
         """
         # add hull if possible
         if self.hull_builder and add_hull:
-            threadsafe_hullbuilder = HullBuilder(erosion_type=self.hull_builder.erosion_type,
-                                                 apply_erosion=self.hull_builder.apply_erosion,
-                                                 apply_smoothing=self.hull_builder.apply_smoothing)
+            threadsafe_hullbuilder = _get_hull_builder(erosion_type=self.hull_builder.erosion_type,
+                                                       apply_erosion=self.hull_builder.apply_erosion,
+                                                       apply_smoothing=self.hull_builder.apply_smoothing,
+                                                       n_jobs=self.hull_builder.n_jobs)
             threadsafe_hullbuilder.add_external_hull(structure=cs.content)
+            cs.invalidate_unique_blocks()
         # set the color
         cs.content.set_color(color=cs.base_color)
         # rotate according to tileset orientation
@@ -309,6 +412,13 @@ class MAPElites:
         """
         cs.b_descs = (self.b_descs[0](cs), self.b_descs[1](cs))
 
+    def _update_bins_edges(self) -> None:
+        """Update the lower edges of the bins along each behavior descriptor.
+        Must be called whenever the bin sizes or the behavior descriptors change.
+        """
+        self._bins_edges = (np.cumsum([0] + self.bin_sizes[0][:-1]) + self.b_descs[0].bounds[0],
+                            np.cumsum([0] + self.bin_sizes[1][:-1]) + self.b_descs[1].bounds[0])
+
     def subdivide_range(self,
                         bin_idx: Tuple[int, int]) -> None:
         """Subdivide the chosen bin range.
@@ -320,7 +430,7 @@ class MAPElites:
         i, j = bin_idx
         # get solutions
         all_cs = []
-        for (_, _), cbin in np.ndenumerate(self.bins):
+        for cbin in self.bins.flat:
             all_cs.extend([*cbin._feasible, *cbin._infeasible])
         logging.getLogger('mapelites').debug(f'[{__name__}.subdivide_range] Starting subdivision at {bin_idx=}; {self.bins.shape=}.')
         # update bin sizes
@@ -329,6 +439,7 @@ class MAPElites:
         self.bin_sizes[1][j] = v_j / 2
         self.bin_sizes[0].insert(i + 1, v_i / 2)
         self.bin_sizes[1].insert(j + 1, v_j / 2)
+        self._update_bins_edges()
         # update bin quantity
         self.bin_qnt = (self.bin_qnt[0] + 1, self.bin_qnt[1] + 1)
         # create new bin map
@@ -361,16 +472,18 @@ class MAPElites:
         Args:
             lcs (List[CandidateSolution]): The list of new solutions.
         """
-        bc0 = np.cumsum([0] + self.bin_sizes[0][:-1]) + self.b_descs[0].bounds[0]
-        bc1 = np.cumsum([0] + self.bin_sizes[1][:-1]) + self.b_descs[1].bounds[0]
+        bc0, bc1 = self._bins_edges
         logging.getLogger('mapelites').debug(f'[{__name__}._update_bins] Started updating bins...')
-        for cs in lcs:
-            b0, b1 = cs.b_descs
-            i = np.digitize(x=[b0], bins=bc0, right=False)[0] - 1
-            j = np.digitize(x=[b1], bins=bc1, right=False)[0] - 1
+        b0s = np.fromiter((cs.b_descs[0] for cs in lcs), dtype=np.float64, count=len(lcs))
+        b1s = np.fromiter((cs.b_descs[1] for cs in lcs), dtype=np.float64, count=len(lcs))
+        # bin edges are cumulative sums, so they are already sorted
+        # descriptors below the lower bound go in the first bin
+        idxs_i = np.clip(np.searchsorted(bc0, b0s, side='right') - 1, 0, self.bins.shape[0] - 1)
+        idxs_j = np.clip(np.searchsorted(bc1, b1s, side='right') - 1, 0, self.bins.shape[1] - 1)
+        for cs, i, j in zip(lcs, idxs_i.tolist(), idxs_j.tolist()):
             self.bins[i, j].insert_cs(cs)
         if self.allow_aging:
-            for (_, _), b in np.ndenumerate(self.bins):
+            for b in self.bins.flat:
                 b.remove_old()
 
     def _age_bins(self,
@@ -381,16 +494,65 @@ class MAPElites:
             diff (int, optional): The quantity to age for. Defaults to `-1`.
         """
         if self.allow_aging:
-            for (_, _), cbin in np.ndenumerate(self.bins):
+            for cbin in self.bins.flat:
                 cbin.age(diff=diff)
 
+    def _bins_sizes(self,
+                    population: str = 'feasible') -> npt.NDArray[np.int64]:
+        """Get the size of the population of every bin.
+
+        Args:
+            population (str, optional): The population. Defaults to `'feasible'`.
+
+        Returns:
+            npt.NDArray[np.int64]: The sizes, with the same shape as the bins.
+        """
+        return np.fromiter((len(cbin._feasible if population == 'feasible' else cbin._infeasible) for cbin in self.bins.flat),
+                           dtype=np.int64, count=self.bins.size).reshape(self.bins.shape)
+
+    def _bins_metric(self,
+                     metric: str,
+                     use_mean: bool = True,
+                     population: str = 'feasible') -> npt.NDArray[np.float64]:
+        """Get the value of the metric for every bin, as in `MAPBin.get_metric`.
+
+        Args:
+            metric (str): The metric name.
+            use_mean (bool, optional): Whether to compute the metric over the population or just the elite. Defaults to `True`.
+            population (str, optional): Which population to compute the metric on. Defaults to `'feasible'`.
+
+        Raises:
+            NotImplementedError: Raised if the metric is not recognized.
+
+        Returns:
+            npt.NDArray[np.float64]: The values, with the same shape as the bins (`0.` for empty bins).
+        """
+        sizes = self._bins_sizes(population=population)
+        if metric == 'size':
+            return sizes.astype(np.float64)
+        elif metric not in ['fitness', 'age']:
+            raise NotImplementedError(f'Unrecognized metric {metric}')
+        attr = 'c_fitness' if metric == 'fitness' else 'age'
+        # values of all solutions with the flat index of their bin, aggregated per bin
+        values = np.asarray([getattr(cs, attr) for cbin in self.bins.flat for cs in (cbin._feasible if population == 'feasible' else cbin._infeasible)], dtype=np.float64)
+        bins_ns = np.repeat(np.arange(self.bins.size), sizes.ravel())
+        sizes = sizes.ravel()
+        if use_mean:
+            values = np.bincount(bins_ns, weights=values, minlength=self.bins.size).astype(np.float64)
+            values = np.divide(values, sizes, out=np.zeros_like(values), where=sizes > 0)
+        else:
+            maxs = np.full(shape=self.bins.size, fill_value=-np.inf)
+            np.maximum.at(maxs, bins_ns, values)
+            values = np.where(sizes > 0, maxs, 0.)
+        return values.reshape(self.bins.shape)
+
     def _valid_bins(self) -> List[MAPBin]:
         """Get all the valid bins. A valid bin is a bin with at least 2 Feasible solution and 2 Infeasible solution.
 
         Returns:
             List[MAPBin]: The list of valid bins.
         """
-        return [cbin for (_, _), cbin in np.ndenumerate(self.bins) if len(cbin._feasible) > 0]
+        return self.bins[self._bins_sizes(population='feasible') > 0].tolist()
 
     def _check_res_trigger(self) -> List[Tuple[int, int]]:
         """Trigger a resolution increase if at least 1 bin has reached full population capacity for both Feasible and Infeasible populations.
@@ -399,7 +561,8 @@ class MAPElites:
             List[Tuple[int, int]]: The indices of bins that were subdivided.
         """
         if self.allow_res_increase:
-            to_increase_res = [cbin.bin_idx for (_, _), cbin in np.ndenumerate(self.bins) if len(cbin._feasible) >= BIN_POP_SIZE and len(cbin._infeasible) >= BIN_POP_SIZE and cbin.subdividable]
+            full_bins = (self._bins_sizes(population='feasible') >= BIN_POP_SIZE) & (self._bins_sizes(population='infeasible') >= BIN_POP_SIZE)
+            to_increase_res = [cbin.bin_idx for cbin in self.bins[full_bins].tolist() if cbin.subdividable]
             for bin_idx in reversed(to_increase_res):
                 self.subdivide_range(bin_idx=bin_idx)
             return to_increase_res
@@ -418,19 +581,19 @@ class MAPElites:
             List[Tuple[int, int]]: The processed indices of expanded bins.
         """
         logging.getLogger('mapelites').debug(msg=f'[{__name__}._process_expanded_idxs] pre {selected_idxs=}; {expanded_idxs=}')
-        processed_idxs = [idx for idx in selected_idxs]
-        for (m, n) in selected_idxs:
-            for (i, j) in expanded_idxs:
-                if m == i:
-                    processed_idxs.append((m + 1, n))
-                if n == j:
-                    processed_idxs.append((m, n + 1))
-                if m == i and n == j:
-                    processed_idxs.append((m + 1, n + 1))
-        for i, (m, n) in enumerate(processed_idxs):
-            lm = len([x[0] for x in expanded_idxs if x[0] < m])
-            ln = len([x[1] for x in expanded_idxs if x[1] < n])
-            processed_idxs[i] = (m + lm, n + ln)
+        selected = np.asarray(selected_idxs, dtype=np.int64).reshape(-1, 2)
+        expanded = np.asarray(expanded_idxs, dtype=np.int64).reshape(-1, 2)
+        # for each (selected, expanded) pair, the bins added by the expansion of the same row, column, or both
+        same_m = selected[:, None, 0] == expanded[None, :, 0]
+        same_n = selected[:, None, 1] == expanded[None, :, 1]
+        added_mask = np.stack([same_m, same_n, same_m & same_n], axis=-1)
+        added = selected[:, None, None, :] + np.array([[1, 0], [0, 1], [1, 1]], dtype=np.int64)
+        added = np.broadcast_to(added, added_mask.shape + (2, ))[added_mask]
+        processed_idxs = np.concatenate([selected, added])
+        # shift by the number of expanded rows and columns before each bin
+        processed_idxs[:, 0] += np.searchsorted(np.sort(expanded[:, 0]), processed_idxs[:, 0], side='left')
+        processed_idxs[:, 1] += np.searchsorted(np.sort(expanded[:, 1]), processed_idxs[:, 1], side='left')
+        processed_idxs = list(map(tuple, processed_idxs.tolist()))
         logging.getLogger('mapelites').debug(msg=f'[{__name__}._process_expanded_idxs] post {processed_idxs=}')
         return processed_idxs
 
@@ -444,10 +607,8 @@ class MAPElites:
         self.b_descs = bs
         self.limits = (self.b_descs[0].bounds[1] if self.b_descs[0].bounds is not None else 20,
                        self.b_descs[1].bounds[1] if self.b_descs[1].bounds is not None else 20)
-        lcs = []
-        for (_, _), cbin in np.ndenumerate(self.bins):
-            lcs.extend([*cbin._feasible, *cbin._infeasible])
-            Parallel(n_jobs=-1, prefer="threads")(delayed(self._set_behavior_descriptors)(cs) for cs in lcs)
+        lcs = [cs for cbin in self.bins.flat for cs in [*cbin._feasible, *cbin._infeasible]]
+        Parallel(n_jobs=-1, prefer="threads")(delayed(self._set_behavior_descriptors)(cs) for cs in lcs)
         self.reset(lcs=lcs)
 
     def toggle_module_mutability(self,
@@ -458,7 +619,7 @@ class MAPElites:
             module (str): The module's name.
         """
         # toggle module's mutability in the solution
-        for (_, _), cbin in np.ndenumerate(self.bins):
+        for cbin in self.bins.flat:
             cbin.toggle_module_mutability(module=module)
         # toggle module's mutability within the L-system
         ms = [x.name for x in self.lsystem.modules]
@@ -476,9 +637,13 @@ class MAPElites:
         for w, f in zip(weights, self.feasible_fitnesses):
             f.weight = w
         # update solutions fitnesses
-        for (_, _), cbin in np.ndenumerate(self.bins):
-            for cs in cbin._feasible:
-                cs.c_fitness = sum([self.feasible_fitnesses[i].weight * cs.fitness[i] for i in range(len(cs.fitness))]) + (self.nsc - cs.ncv)
+        feasible = [cs for cbin in self.bins.flat for cs in cbin._feasible]
+        if feasible:
+            fitnesses = np.asarray([cs.fitness for cs in feasible], dtype=np.float64)
+            ncvs = np.asarray([cs.ncv for cs in feasible], dtype=np.float64)
+            c_fitnesses = (fitnesses * np.asarray(weights, dtype=np.float64)).sum(axis=1) + (self.nsc - ncvs)
+            for cs, c_fitness in zip(feasible, c_fitnesses.tolist()):
+                cs.c_fitness = c_fitness
 
     def _within_range(self,
                       cs: CandidateSolution) -> bool:
@@ -493,6 +658,24 @@ class MAPElites:
         cs_dims = cs.content._max_dims if cs._content else cs.content_size
         return self.x_range[0] <= cs_dims[0] <= self.x_range[1] and self.y_range[0] <= cs_dims[1] <= self.y_range[1] and self.z_range[0] <= cs_dims[2] <= self.z_range[1]
     
+    def _filter_within_range(self,
+                             lcs: List[CandidateSolution]) -> List[CandidateSolution]:
+        """Keep only the solutions with dimensions within the allowed range.
+
+        Args:
+            lcs (List[CandidateSolution]): The candidate solutions.
+
+        Returns:
+            List[CandidateSolution]: The solutions within the allowed range.
+        """
+        if not lcs:
+            return []
+        dims = np.asarray([cs.content._max_dims if cs._content else cs.content_size for cs in lcs])
+        lows = np.asarray([self.x_range[0], self.y_range[0], self.z_range[0]])
+        highs = np.asarray([self.x_range[1], self.y_range[1], self.z_range[1]])
+        within = np.all((lows <= dims) & (dims <= highs), axis=1)
+        return [cs for cs, is_within in zip(lcs, within.tolist()) if is_within]
+    
     def generate_initial_populations(self,
                                      pop_size: int = POP_SIZE,
                                      n_retries: int = N_RETRIES) -> None:
@@ -504,6 +687,8 @@ class MAPElites:
         """
         # create populations
         feasible_pop, infeasible_pop = [], []
+        # solutions compare by their string, so membership is tracked on the strings
+        feasible_strings, infeasible_strings = set(), set()
         self.lsystem.disable_sat_check()
         with trange(n_retries, desc='Initialization ') as iterations:
             for i in iterations:
@@ -513,16 +698,28 @@ class MAPElites:
                                                      make_graph=False)
                 subdivide_solutions(lcs=solutions,
                                     lsystem=self.lsystem)
+                n_feasible = len(feasible_pop)
                 for cs in solutions:
                     self._prepare_cs_content(cs=cs,
                                              add_hull=False)
                     if self._within_range(cs=cs):
-                        if cs.is_feasible and len(feasible_pop) < pop_size and cs not in feasible_pop:
-                            if self.hull_builder is not None:
-                                self.hull_builder.add_external_hull(structure=cs._content)
-                            feasible_pop.append(self._assign_fitness(cs=cs))
-                        elif not cs.is_feasible and len(infeasible_pop) < pop_size and cs not in feasible_pop:
+                        if cs.is_feasible and len(feasible_pop) < pop_size and cs.string not in feasible_strings:
+                            feasible_pop.append(cs)
+                            feasible_strings.add(cs.string)
+                        elif not cs.is_feasible and len(infeasible_pop) < pop_size and cs.string not in infeasible_strings:
                             infeasible_pop.append(self._assign_fitness(cs=cs))
+                            infeasible_strings.add(cs.string)
+                # hulls of the new feasible solutions are built together, then their fitness is assigned
+                new_feasible = feasible_pop[n_feasible:]
+                if self.hull_builder is not None:
+                    if len(new_feasible) >= _min_process_pool_size:
+                        self._build_hulls(lcs=new_feasible)
+                    else:
+                        for cs in new_feasible:
+                            self.hull_builder.add_external_hull(structure=cs._content)
+                            cs.invalidate_unique_blocks()
+                for cs in new_feasible:
+                    self._assign_fitness(cs=cs)
                 iterations.set_postfix(ordered_dict={
                     'fpop-size': f'{len(feasible_pop)}/{pop_size}',
                     'ipop-size': f'{len(infeasible_pop)}/{pop_size}'
@@ -538,6 +735,25 @@ class MAPElites:
         if self.emitter is not None and self.emitter.requires_init:
             self.emitter.init_emitter(bins=self.bins)
 
+    def _build_hulls(self,
+                     lcs: List[CandidateSolution]) -> None:
+        """Add the hull to the content of the solutions in separate processes.
+        Building hulls is CPU-bound Python code, so large batches are faster in processes than in threads.
+
+        Args:
+            lcs (List[CandidateSolution]): The solutions.
+        """
+        # only the structures are sent to the workers, not the solutions and their lineage
+        hull_args = {'erosion_type': self.hull_builder.erosion_type,
+                     'apply_erosion': self.hull_builder.apply_erosion,
+                     'apply_smoothing': self.hull_builder.apply_smoothing,
+                     'n_jobs': self.hull_builder.n_jobs}
+        batch_size = max(1, len(lcs) // ((os.cpu_count() or 1) * 4))
+        contents = Parallel(n_jobs=-1, backend='loky', batch_size=batch_size)(delayed(_build_hull)(structure=cs.content, **hull_args) for cs in lcs)
+        for cs, content in zip(lcs, contents):
+            cs._content = content
+            cs.invalidate_unique_blocks()
+
     def _step(self,
               populations: List[List[CandidateSolution]],
               gen: int) -> List[CandidateSolution]:
@@ -571,16 +787,22 @@ class MAPElites:
                     logging.getLogger('mapelites').debug(msg=f'[{__name__}._step] {len(new_pool)=}')
                     subdivide_solutions(lcs=new_pool,
                                         lsystem=self.lsystem)
-                    logging.getLogger('mapelites').debug(msg=f'[{__name__}._step] Started preparing solutions')
-                    new_pool = Parallel(n_jobs=-1, prefer="threads")(delayed(self._prepare_cs_content)(cs) for cs in new_pool)
-                    logging.getLogger('mapelites').debug(msg=f'[{__name__}._step] Started assigning fitnesses')
-                    generated.extend(Parallel(n_jobs=-1, prefer="threads")(delayed(self._assign_fitness)(cs) for cs in new_pool))
+                    generated.extend(new_pool)
                 # evoexceptions are ignored, though it is possible to get stuck here
                 except EvoException as e:
                     logging.getLogger('mapelites').error(msg=f'[{__name__}._step] {e}')
                     pass
+        # the offspring of both populations are prepared together, so that their hulls are built in a single batch
+        logging.getLogger('mapelites').debug(msg=f'[{__name__}._step] Started preparing solutions')
+        if self.hull_builder and len(generated) >= _min_process_pool_size:
+            self._build_hulls(lcs=generated)
+            generated = Parallel(n_jobs=-1, prefer="threads")(delayed(self._prepare_cs_content)(cs, add_hull=False) for cs in generated)
+        else:
+            generated = Parallel(n_jobs=-1, prefer="threads")(delayed(self._prepare_cs_content)(cs) for cs in generated)
+        logging.getLogger('mapelites').debug(msg=f'[{__name__}._step] Started assigning fitnesses')
+        generated = Parallel(n_jobs=-1, prefer="threads")(delayed(self._assign_fitness)(cs) for cs in generated)
         
-        generated = list(filter(self._within_range, generated))
+        generated = self._filter_within_range(lcs=generated)
         
         # if possible, train the estimator for fitness acquirement
         if self.estimator is not None:
@@ -606,14 +828,14 @@ class MAPElites:
             logging.getLogger('mapelites').debug(f'[{__name__}._step] Started realignment...')
             if self.estimator.is_trained and gen % ALIGNMENT_INTERVAL == 0:
                 # Reassign previous infeasible fitnesses
-                for (_, _), cbin in np.ndenumerate(self.bins):
-                    for cs in cbin._infeasible:
-                        if cs.age > ALIGNMENT_INTERVAL:
-                            if cs._content is None:
-                                self.lsystem._set_structure(cs=cs,
-                                                            make_graph=False)
-                            self._prepare_cs_content(cs)
-                            cs.c_fitness = self.compute_fitness(cs=cs)
+                to_realign = [cs for cbin in self.bins.flat for cs in cbin._infeasible if cs.age > ALIGNMENT_INTERVAL]
+                for cs in to_realign:
+                    if cs._content is None:
+                        self.lsystem._set_structure(cs=cs,
+                                                    make_graph=False)
+                    self._prepare_cs_content(cs)
+                    cs.representation = [f(cs) for f in _infeasible_representation_fitnesses]
+                self._predict_infeasible_fitnesses(lcs=to_realign)
         # metrics tracking
         self.n_new_solutions += len(generated)
         return generated
@@ -650,27 +872,23 @@ class MAPElites:
             List[CandidateSolution]: The list of neighbouring solutions, if it exists.
         """
         new_pop = []
-        inspecting = [idx for idx in bin_idxs]
-        offsets = [(-1, -1), (-1, 0), (-1,1), (0, -1), (0, 1), (1, -1),  (1, 0), (1, 1)]
-        np.random.shuffle(offsets)
-        logging.getLogger('mapelites').debug(msg=f'[{__name__}.seek_nearest_valid] {pop=}; {inspecting=}')
-        while new_pop == []:
-            to_inspect = []
-            past_idxs = []
-            for idx in inspecting:
-                for offset in offsets:
-                    new_idx = (idx[0] + offset[0], idx[1] + offset[1])
-                    if 0 <= new_idx[0] < self.bins.shape[0] and 0 <= new_idx[1] < self.bins.shape[1]:
-                        pool = self.bins[new_idx]._feasible if pop == 'feasible' else self.bins[new_idx]._infeasible
-                        if pool:
-                            new_pop.extend(pool) 
-                            break
-                        else:
-                            if idx not in past_idxs:
-                                to_inspect.append(new_idx)
-            if to_inspect == []:
-                break
-            inspecting = to_inspect
+        logging.getLogger('mapelites').debug(msg=f'[{__name__}.seek_nearest_valid] {pop=}; {bin_idxs=}')
+        valid_idxs = np.argwhere(self._bins_sizes(population=pop) > 0)
+        if bin_idxs and valid_idxs.size > 0:
+            # chebyshev distance between each bin index and each non-empty bin
+            dists = np.abs(np.asarray(bin_idxs)[:, None, :] - valid_idxs[None, :, :]).max(axis=-1)
+            min_dist = dists.min()
+            # pick one of the closest non-empty bins for each bin index that has one
+            picked = set()
+            for bin_dists in dists:
+                closest = np.flatnonzero(bin_dists == min_dist)
+                if closest.size > 0:
+                    picked_idx = np.random.choice(closest)
+                    # bins shared by nearby bin indices are collected only once
+                    if picked_idx not in picked:
+                        picked.add(picked_idx)
+                        cbin = self.bins[tuple(valid_idxs[picked_idx])]
+                        new_pop.extend(cbin._feasible if pop == 'feasible' else cbin._infeasible)
         logging.getLogger('mapelites').debug(msg=f'[{__name__}.seek_nearest_valid] {new_pop=}')
         return new_pop
     
@@ -690,12 +908,12 @@ class MAPElites:
         bin_idxs = [tuple(b) for b in bin_idxs]
         logging.getLogger('mapelites').debug(f'[{__name__}.interactive_step] Picked {bin_idxs=}.')
         chosen_bins = [self.bins[bin_idx] for bin_idx in bin_idxs]
-        f_pop, i_pop = [], []
-        for chosen_bin in chosen_bins:
-            if self.enforce_qnt:
-                assert chosen_bin in self._valid_bins(), f'Bin at {chosen_bin.bin_idx} is not a valid bin.'
-            f_pop.extend(chosen_bin._feasible)
-            i_pop.extend(chosen_bin._infeasible)
+        if self.enforce_qnt:
+            valid_bins = set(map(id, self._valid_bins()))
+            for chosen_bin in chosen_bins:
+                assert id(chosen_bin) in valid_bins, f'Bin at {chosen_bin.bin_idx} is not a valid bin.'
+        f_pop = list(itertools.chain.from_iterable(chosen_bin._feasible for chosen_bin in chosen_bins))
+        i_pop = list(itertools.chain.from_iterable(chosen_bin._infeasible for chosen_bin in chosen_bins))
         if i_pop == []:
             i_pop = self.seek_nearest_valid(bin_idxs=bin_idxs,
                                             pop='infeasible')
@@ -751,26 +969,24 @@ class MAPElites:
                 self.infeas_fitness_idx = 2
             else:
                 raise NotImplementedError(f'Unrecognized merge method from bandit action: {method_str}')
-            # update existing solution's fitness
-            for (_, _), cbin in np.ndenumerate(self.bins):
-                for cs in cbin._infeasible:
-                    cs.c_fitness = cs.fitness[self.infeas_fitness_idx]
+            # update existing solution's fitness (new solutions already use the current merge method)
+            if self.infeas_fitness_idx != self._applied_infeas_fitness_idx:
+                for cbin in self.bins.flat:
+                    for cs in cbin._infeasible:
+                        cs.c_fitness = cs.fitness[self.infeas_fitness_idx]
+                self._applied_infeas_fitness_idx = self.infeas_fitness_idx
         s = time.perf_counter()
         selected_bins = self.emitter.pick_bin(bins=self.bins)
         emitter_time += time.perf_counter() - s
         logging.getLogger('mapelites').debug(msg=f'[{__name__}.emitter_step] {selected_bins=}')
         if selected_bins:
-            fpop, ipop = [], []
             # TODO: this could be handled better
             if isinstance(selected_bins[0], MAPBin):
-                for selected_bin in selected_bins:
-                    fpop.extend(selected_bin._feasible)
-                    ipop.extend(selected_bin._infeasible)
+                fpop = list(itertools.chain.from_iterable(selected_bin._feasible for selected_bin in selected_bins))
+                ipop = list(itertools.chain.from_iterable(selected_bin._infeasible for selected_bin in selected_bins))
             elif isinstance(selected_bins[0], list):
-                for selected_bin in selected_bins[0]:
-                    fpop.extend(selected_bin._feasible)
-                for selected_bin in selected_bins[1]:
-                    ipop.extend(selected_bin._infeasible)
+                fpop = list(itertools.chain.from_iterable(selected_bin._feasible for selected_bin in selected_bins[0]))
+                ipop = list(itertools.chain.from_iterable(selected_bin._infeasible for selected_bin in selected_bins[1]))
             else:
                 raise NotImplementedError(f'Unrecognized emitter output: {selected_bins}.')
             logging.getLogger('mapelites').debug(msg=f'[{__name__}.emitter_step] {len(fpop)=}; {len(ipop)=}')
@@ -792,7 +1008,7 @@ class MAPElites:
             emitter_time += time.perf_counter() - s
             if self.agent is not None:
                 self.agent.reward_bandit(bandit=bandit,
-                                         reward=sum([f(self) for f in self.agent_rewards]))
+                                         reward=sum(f(self) for f in self.agent_rewards))
         return emitter_time
 
     def update_valid_ranges(self,
@@ -807,9 +1023,14 @@ class MAPElites:
             z_range (Tuple[int, int]): The new range for the Z axis.
         """
         self.x_range, self.y_range, self.z_range = x_range, y_range, z_range
-        for (_, _), b in np.ndenumerate(self.bins):
-            b._feasible = list(filter(self._within_range, b._feasible))
-            b._infeasible = list(filter(self._within_range, b._infeasible))
+        # filter the whole archive at once, then keep the remaining solutions in their bins
+        lcs = [cs for b in self.bins.flat for cs in [*b._feasible, *b._infeasible]]
+        within = set(map(id, self._filter_within_range(lcs=lcs)))
+        for b in self.bins.flat:
+            if b._feasible:
+                b._feasible = [cs for cs in b._feasible if id(cs) in within]
+            if b._infeasible:
+                b._infeasible = [cs for cs in b._infeasible if id(cs) in within]
     
     
     def reset(self,
@@ -823,7 +1044,9 @@ class MAPElites:
         self.bin_qnt = self._initial_n_bins
         self.bin_sizes = [[self.limits[0] / self.bin_qnt[0]] * self._initial_n_bins[0],
                           [self.limits[1] / self.bin_qnt[1]] * self._initial_n_bins[1]]
+        self._update_bins_edges()
         self.bins = np.empty(shape=self.bin_qnt, dtype=MAPBin)
+        self._applied_infeas_fitness_idx = None
         for (i, j), _ in np.ndenumerate(self.bins):
             self.bins[i, j] = MAPBin(bin_idx=(i, j),
                                      bin_size=(self.bin_sizes[0][i], self.bin_sizes[1][j]))
@@ -854,25 +1077,48 @@ class MAPElites:
             self.generate_initial_populations()
 
     def save_population(self,
-                        filename: str = './population.pop') -> None:
+                        filename: str = './population.pop',
+                        use_pickle: bool = False) -> None:
+        """Save the solutions in the bins to file.
+
+        Args:
+            filename (str, optional): The file name. Defaults to `'./population.pop'`.
+            use_pickle (bool, optional): Whether to pickle the solutions' JSON objects instead of writing them as JSON. Pickled populations are faster to save and load, but can only be read from Python. Defaults to `False`.
+        """
         all_cs = []
-        for (_, _), b in np.ndenumerate(self.bins):
+        for b in self.bins.flat:
             for cs in [*b._feasible, *b._infeasible]:
                 all_cs.append(cs.to_json())
-        with open(filename, 'w') as f:
-            f.write(json_dumps(all_cs))
+        if use_pickle:
+            with open(filename, 'wb') as f:
+                pickle.dump(all_cs, f, protocol=5)
+        else:
+            with open(filename, 'w') as f:
+                f.write(json_dumps(all_cs))
        
     def load_population(self,
-                        filename: str = './population.pop') -> None:
+                        filename: str = './population.pop',
+                        use_pickle: bool = False) -> None:
+        """Load solutions from file and add them to the bins.
+
+        Args:
+            filename (str, optional): The file name. Defaults to `'./population.pop'`.
+            use_pickle (bool, optional): Whether the population was saved with `use_pickle`. Defaults to `False`.
+        """
         all_cs = []
-        with open(filename, 'r') as f:
-            all_cs = [CandidateSolution.from_json(x) for x in json_loads(f.read())]
+        if use_pickle:
+            with open(filename, 'rb') as f:
+                all_cs = [CandidateSolution.from_json(x) for x in pickle.load(f)]
+        else:
+            with open(filename, 'r') as f:
+                all_cs = [CandidateSolution.from_json(x) for x in json_loads(f.read())]
         # add to population
+        self._applied_infeas_fitness_idx = None
         self._update_bins(lcs=all_cs)
-        # update bins for elites
-        self.update_elites()
-        for (_, _), b in np.ndenumerate(self.bins):
+        # update bins for elites and set the content of the elites, in a single sweep
+        for b in self.bins.flat:
             for pop in ['feasible', 'infeasible']:
+                b.check_new_elite(pop=pop)
                 if b.non_empty(pop=pop):
                     e = b.get_elite(population=pop)
                     if e._content is None:
@@ -889,7 +1135,7 @@ class MAPElites:
         Args:
             reset (bool, optional): Whether to reset the tracking. Defaults to False.
         """
-        for (_, _), b in np.ndenumerate(self.bins):
+        for b in self.bins.flat:
             for pop in ['feasible', 'infeasible']:
                 if reset:
                     b.new_elite[pop] = False
@@ -905,11 +1151,9 @@ class MAPElites:
         Returns:
             float: The population complexity.
         """
-        all_lenghts = []
-        for (_, _), b in np.ndenumerate(self.bins):
-            for cs in b._feasible if pop == 'feasible' else b._infeasible:
-                all_lenghts.append(cs.n_blocks)
-        return np.average(all_lenghts)
+        all_lenghts = np.fromiter((cs.n_blocks for b in self.bins.flat for cs in (b._feasible if pop == 'feasible' else b._infeasible)),
+                                  dtype=np.float64)
+        return all_lenghts.mean()
     
     
     def total_solutions(self,
@@ -922,7 +1166,7 @@ class MAPElites:
         Returns:
             int: The total number of solutions in the archive for the selected population.
         """
-        return np.sum([b.get_metric(metric='size', population=pop) for (_, _), b in np.ndenumerate(self.bins)])
+        return int(self._bins_sizes(population=pop).sum())
     
     
     def to_json(self) -> Dict[str, Any]:
@@ -1032,8 +1276,8 @@ def get_coverage(mapelites: MAPElites,
     Returns:
         Tuple[int, int]: The number of non-empty bins and the total number of bins.
     """
-    t = mapelites.bins.shape[0] * mapelites.bins.shape[1]
-    c = sum([1 if cbin.non_empty(pop=pop) else 0 for (_, _), cbin in np.ndenumerate(mapelites.bins)])
+    t = mapelites.bins.size
+    c = int(np.count_nonzero(mapelites._bins_sizes(population=pop)))
     return c, t
 
 
@@ -1048,12 +1292,10 @@ def get_fitness_metrics(mapelites: MAPElites,
     Returns:
         Tuple[int, int]: The top and mean fitness.
     """
-    fs = []
-    for (_, _), cbin in np.ndenumerate(mapelites.bins):
-        for cs in cbin._feasible if pop == 'feasible' else cbin._infeasible:
-            fs.append(cs.c_fitness)
-    top = min(fs) if pop == 'infeasible' and mapelites.estimator is None else max(fs)
-    return top, np.average(fs)
+    fs = np.fromiter((cs.c_fitness for cbin in mapelites.bins.flat for cs in (cbin._feasible if pop == 'feasible' else cbin._infeasible)),
+                     dtype=np.float64)
+    top = fs.min() if pop == 'infeasible' and mapelites.estimator is None else fs.max()
+    return top, fs.mean()
 
 
 def get_qdscore(mapelites: MAPElites,
@@ -1067,7 +1309,8 @@ def get_qdscore(mapelites: MAPElites,
     Returns:
         float: The QD-Score.
     """
-    return sum([cbin.get_elite(population=pop).c_fitness if cbin.non_empty(pop=pop) else 0 for (_, _), cbin in np.ndenumerate(mapelites.bins)])
+    # the elite of a bin is its solution with the highest fitness
+    return float(mapelites._bins_metric(metric='fitness', use_mean=False, population=pop).sum())
 
 
 def get_new_feas_with_unfeas_parents(mapelites: MAPElites) -> Tuple[int, int]:
@@ -1081,7 +1324,7 @@ def get_new_feas_with_unfeas_parents(mapelites: MAPElites) -> Tuple[int, int]:
     """
     n_new = 0
     total = 0
-    for (_, _), cbin in np.ndenumerate(mapelites.bins):
+    for cbin in mapelites.bins.flat:
         for cs in cbin._feasible:
             if cs.age == CS_MAX_AGE and cs.parents and not cs.parents[0].is_feasible:
                 n_new += 1
@@ -1104,4 +1347,5 @@ def get_random_elite(mapelites: MAPElites,
     Returns:
         CandidateSolution: The random elite.
     """
-    return np.random.choice([cbin for (_, _), cbin in np.ndenumerate(mapelites.bins) if cbin.non_empty(pop=pop)]).get_elite(population=pop)
+    valid_idxs = np.flatnonzero(mapelites._bins_sizes(population=pop))
+    return mapelites.bins.flat[np.random.choice(valid_idxs)].get_elite(population=pop)
@@ -83,6 +83,19 @@ if USE_TORCH:
             with th.no_grad():
                 return self.forward(th.tensor(x).float().unsqueeze(0)).numpy()[0]
         
+        def predict_batch(self,
+                          xs: np.ndarray) -> np.ndarray:
+            """Predict the quantiles of multiple inputs in a single forward pass.
+
+            Args:
+                xs (np.ndarray): The inputs, one per row.
+
+            Returns:
+                np.ndarray: The predicted quantiles, one row per input.
+            """
+            with th.no_grad():
+                return self.forward(th.tensor(xs).float()).numpy()
+        
         def save(self,
                 fname: str):
             """Save the current model to file.
@@ -161,6 +174,19 @@ if USE_TORCH:
             with th.no_grad():
                 return self.forward(th.tensor(x).float()).numpy()[0]
         
+        def predict_batch(self,
+                          xs: np.ndarray) -> np.ndarray:
+            """Predict the fitness of multiple inputs in a single forward pass.
+
+            Args:
+                xs (np.ndarray): The inputs, one per row.
+
+            Returns:
+                np.ndarray: The predicted fitnesses.
+            """
+            with th.no_grad():
+                return self.forward(th.tensor(xs).float()).numpy()[:, 0]
+        
         def save(self,
                 fname: str):
             """Save the current model to file.
@@ -350,6 +376,27 @@ class GaussianEstimator:
         else:
             raise NotImplementedError(f'Unrecognized bound ({self.bound}) encountered in GaussianEstimator.')
         return f
+    
+    def predict_batch(self,
+                      xs: np.ndarray) -> np.ndarray:
+        """Predict the fitness of multiple inputs with a single regressor call.
+
+        Args:
+            xs (np.ndarray): The inputs, one per row.
+
+        Raises:
+            NotImplementedError: Raised if the bound is not recognized.
+
+        Returns:
+            np.ndarray: The predicted fitnesses.
+        """
+        y_mean, y_std = self.gpr.predict(xs, return_std=True)
+        if self.bound == 'upper':
+            return (y_mean + y_std) / self.max_f
+        elif self.bound == 'lower':
+            return np.maximum(y_mean - y_std, self.min_f)
+        else:
+            raise NotImplementedError(f'Unrecognized bound ({self.bound}) encountered in GaussianEstimator.')
          
     def to_json(self) -> Dict[str, Any]:
         return {
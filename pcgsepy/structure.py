@@ -13,6 +13,8 @@ from pcgsepy.common.vecs import Orientation, Vec
 
 # Sizes of blocks in grid spaces
 _blocks_sizes = {'Small': 1, 'Normal': 2, 'Large': 5}
+# Values of block types in the structure arrays
+_blocks_values = {block_type: i + 1 for i, block_type in enumerate(block_definitions.keys())}
 
 
 grid_to_coords = 0.5
@@ -301,7 +303,7 @@ class Structure:
                 r = block.scaled_size
                 if np.sum(self._scaled_arr[i:i + r.x, j:j + r.y, k:k + r.z]) != 0:
                     self._has_intersections = True
-                self._scaled_arr[i:i + r.x, j:j + r.y, k:k + r.z] = list(block_definitions.keys()).index(block.block_type) + 1
+                self._scaled_arr[i:i + r.x, j:j + r.y, k:k + r.z] = _blocks_values[block.block_type]
         return self._scaled_arr
 
     @property
@@ -318,7 +320,7 @@ class Structure:
                 r = Vec.from_tuple(r).scale(v=1 / self.grid_size).to_veci().as_tuple()
                 if np.sum(self._arr[r]) != 0:
                     self._has_intersections = True
-                self._arr[r] = list(block_definitions.keys()).index(block.block_type) + 1
+                self._arr[r] = _blocks_values[block.block_type]
         return self._arr
 
     @property